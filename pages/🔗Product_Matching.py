@@ -0,0 +1,69 @@
+import streamlit as st
+import pandas as pd
+from utils.catalog import get_catalog
+from utils.matching import SCORERS, match_catalogs
+
+st.title("🔗 Match Products Between Catalogs")
+
+# -------------------- CATALOG SCOPES --------------------
+catalog = get_catalog()
+scopes = {
+    f"{source} · {category or 'All'} ({count} products)": (source, category)
+    for source, category, count in catalog.scopes()
+}
+
+if not scopes:
+    st.info("The local catalog is empty — scrape some products first.")
+    st.stop()
+
+labels = list(scopes)
+left_label = st.sidebar.selectbox("🏠 Our products", labels)
+right_label = st.sidebar.selectbox("🏷️ Competitor products", labels, index=min(1, len(labels) - 1))
+
+top_n = st.sidebar.slider("🥇 Matches per product", 1, 10, 3)
+score_cutoff = st.sidebar.slider("🎯 Minimum score", 50, 100, 80, 5)
+scorer = st.sidebar.selectbox("🧮 Scorer", list(SCORERS))
+
+# -------------------- MATCHING --------------------
+if st.sidebar.button("🔗 Match Catalogs"):
+    try:
+        left = catalog.load(*scopes[left_label])
+        right = catalog.load(*scopes[right_label])
+        progress = st.sidebar.progress(0.0, text="Matching...")
+        rows, report = match_catalogs(
+            left, right, top_n=top_n, score_cutoff=score_cutoff, scorer=scorer,
+            progress=lambda done, total: progress.progress(done / total, text=f"🔗 {done}/{total} chunks")
+        )
+        st.session_state.match_rows = rows
+        st.session_state.match_summary = report.summary()
+
+    except Exception as e:
+        st.error(f"An error occurred: {e}")
+
+# -------------------- RESULTS --------------------
+if st.session_state.get("match_rows") is not None:
+    st.caption(st.session_state.match_summary)
+    matches = pd.DataFrame(
+        st.session_state.match_rows,
+        columns=["product", "match", "score", "rank", "product_image_url", "match_image_url"]
+    )
+
+    best_only = st.checkbox("🥇 Best match per product only", value=False)
+    if best_only:
+        matches = matches[matches["rank"] == 1]
+
+    st.dataframe(
+        matches,
+        column_config={
+            "product_image_url": st.column_config.ImageColumn("Product image"),
+            "match_image_url": st.column_config.ImageColumn("Match image"),
+            "score": st.column_config.ProgressColumn("Score", min_value=0, max_value=100, format="%.1f"),
+        },
+        hide_index=True,
+        use_container_width=True
+    )
+
+    st.sidebar.download_button(
+        "📥 Download Matches CSV", data=matches.to_csv(index=False).encode("utf-8"),
+        file_name="product_matches.csv", mime="text/csv"
+    )
@@ -0,0 +1,184 @@
+"""Headless batch scraper for scheduled (cron) runs.
+
+Scrapes every source and category of ``utils.sources`` on a pool of worker
+processes, one host per process, and writes the products to the local
+catalog or to MongoDB Atlas (credentials from ``MONGO_USERNAME`` /
+``MONGO_PASSWORD``)::
+
+    python scrape_cli.py
+    python scrape_cli.py --target mongo --full --mode prune
+    python scrape_cli.py --category "Wrapping Machines" --last-page 5 --full
+
+Each target runs until its last page unless ``--last-page`` is given, and
+only new or changed products are written; pages unchanged since the last
+run are skipped (``--full`` re-emits everything).
+
+Exit codes: 0 when every target succeeded, 1 when any target failed or
+found no listing pages, 2 on bad arguments or missing credentials.
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+from utils.catalog import catalog_sink, get_catalog
+from utils.extractors import LAYOUTS
+from utils.fetcher import HostRateLimiter
+from utils.image_cache import url_image
+from utils.mongo import get_database, upload_products
+from utils.sources import ALIBABA_SOURCE, CATEGORIES, HEADERS, HSC_SOURCE, scrape_targets
+from utils.streaming import ScrapeJob, scrape_pages
+
+log = logging.getLogger("scrape_cli")
+
+# "replace" wipes every source's products, so a per-target run must not use it
+CLI_UPLOAD_MODES = ("soft", "prune", "keep")
+
+
+# -------------------- WORKER --------------------
+def scrape_host(targets, options):
+    """Scrape the targets of one host one after another; runs in a worker process.
+
+    They share one ``HostRateLimiter``, so the host never sees more than
+    ``--requests`` requests in flight however many categories it has.
+    Returns ``(target, summary dict or None, error message or None)`` per target.
+    """
+    limiter = HostRateLimiter(*options.delay, max_per_host=options.requests)
+    results = []
+    for target in targets:
+        try:
+            results.append((target, scrape_target(*target, options, limiter), None))
+        except Exception as e:
+            results.append((target, None, str(e)))
+    return results
+
+
+def scrape_target(source, category, layout, page_urls, options, limiter):
+    """Scrape one target and store its products; returns a summary dict."""
+    until_last = options.last_page is None
+    # The catalog sink stores each page as it arrives; Mongo is written after the scrape, so its log waits for that
+    page_log = None if options.full else get_catalog().page_log(
+        source, category, target=options.target, deferred=options.target == "mongo"
+    )
+    pages = scrape_pages(
+        page_urls, LAYOUTS[layout], headers=HEADERS, max_workers=options.requests, limiter=limiter,
+        until_last=until_last, page_log=page_log
+    )
+    sink = catalog_sink(source, category, index_images=False) if options.target == "catalog" else None
+    job = ScrapeJob(pages, None if until_last else len(page_urls), sink=sink).run()
+    if job.error is not None:
+        raise job.error
+    if not job.pages_done or (options.full and not job.products):
+        raise RuntimeError("no products found on the first listing page")
+
+    result = {"products": len(job.products), "status": job.status_text(), "parse": job.parse_stats.summary()}
+    if options.target == "catalog":
+        if options.index_images:
+            # Background indexing would die with the worker process, so it runs inline here
+            result["indexed"] = get_catalog().index_products(job.products, source, category)
+    else:
+        db = get_database(os.environ["MONGO_USERNAME"], os.environ["MONGO_PASSWORD"])
+        report = upload_products(db, job.products, source=source, category=category,
+                                 mode=options.mode or ("soft" if options.full else "keep"), load_image=url_image)
+        result["upload"] = report.summary()
+        if page_log:
+            page_log.flush()
+    return result
+
+
+# -------------------- CLI --------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape every product source without the Streamlit UI.")
+    parser.add_argument("--target", choices=("catalog", "mongo"), default="catalog",
+                        help="where products are written (default: the local SQLite catalog)")
+    parser.add_argument("--mode", choices=CLI_UPLOAD_MODES, default=None,
+                        help="MongoDB delta-sync mode for products missing from this run "
+                             "(default: soft with --full, else keep; soft/prune need --full)")
+    parser.add_argument("--source", choices=(HSC_SOURCE, ALIBABA_SOURCE), action="append",
+                        help="only scrape this source (repeatable)")
+    parser.add_argument("--category", choices=list(CATEGORIES), action="append",
+                        help="only scrape this Alibaba category (repeatable)")
+    parser.add_argument("--first-page", type=int, default=1)
+    parser.add_argument("--last-page", type=int, default=None,
+                        help="last listing page of every target (default: detect the last page)")
+    parser.add_argument("--full", action="store_true",
+                        help="re-parse every page and emit every product, not only new or changed ones")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="hosts scraped at once, one per worker process (default: every host)")
+    parser.add_argument("--requests", type=int, default=1, help="concurrent requests per host")
+    parser.add_argument("--delay", type=float, nargs=2, default=(1.0, 2.0), metavar=("MIN", "MAX"),
+                        help="delay between requests to one host, in seconds")
+    parser.add_argument("--no-index-images", dest="index_images", action="store_false",
+                        help="skip photo-search indexing of catalog images")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+    if options.target == "mongo" and not (os.environ.get("MONGO_USERNAME") and os.environ.get("MONGO_PASSWORD")):
+        log.error("--target mongo needs MONGO_USERNAME and MONGO_PASSWORD in the environment")
+        return 2
+    if options.mode in ("soft", "prune") and not options.full:
+        # An incremental run only carries new or changed products; everything else would look deleted
+        log.error("--mode %s needs --full", options.mode)
+        return 2
+
+    targets = [
+        target for target in scrape_targets(options.first_page, options.last_page)
+        if (not options.source or target[0] in options.source)
+        and (not options.category or target[1] in options.category)
+    ]
+    if not targets:
+        log.error("No targets match the given --source/--category")
+        return 2
+
+    # One process per host: the per-host request budget holds across all of its categories
+    hosts = defaultdict(list)
+    for target in targets:
+        hosts[urlsplit(target[3][0]).netloc].append(target)
+    processes = min(options.processes or len(hosts), len(hosts))
+
+    started = time.monotonic()
+    products = failed = 0
+    log.info("Scraping %d targets from %d hosts on %d processes into %s",
+             len(targets), len(hosts), processes, options.target)
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = {pool.submit(scrape_host, host_targets, options): host_targets for host_targets in hosts.values()}
+        for future in as_completed(futures):
+            try:
+                outcomes = future.result()
+            except Exception as e:  # the worker process itself died
+                outcomes = [(target, None, str(e)) for target in futures[future]]
+            for (source, category, _, _), result, error in outcomes:
+                label = f"{source} · {category or 'All'}"
+                if error is not None:
+                    failed += 1
+                    log.error("%s: failed: %s", label, error)
+                    continue
+                products += result["products"]
+                log.info("%s: %s", label, result["status"])
+                log.info("%s: %s", label, result["parse"])
+                if "indexed" in result:
+                    log.info("%s: %d images indexed for photo search", label, result["indexed"])
+                if "upload" in result:
+                    log.info("%s: %s", label, result["upload"])
+
+    elapsed = time.monotonic() - started
+    log.info(
+        "Done: %d products from %d/%d targets in %.1fs (%.1f items/s)",
+        products, len(targets) - failed, len(targets), elapsed, products / elapsed if elapsed else 0.0
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+import random
+
+from utils.dedup import dedup_products
+
+WORDS = "automatic pet bottle blow molding machine filling capping labeling water juice semi full line plastic".split()
+
+
+def test_same_name_with_different_images_is_one_cluster():
+    rng = random.Random(1)
+    products = [
+        {"name": " ".join(rng.sample(WORDS, rng.randint(3, 7))), "image_url": f"https://img.example/{i}.jpg"}
+        for i in range(10000)
+    ]
+    products += [
+        {"name": "Automatic PET Bottle Blow Molding Machine", "image_url": "https://img.example/a.jpg"},
+        {"name": "automatic pet bottle blow molding machine", "image_url": "https://img.example/b.jpg"},
+    ]
+    canonical, _ = dedup_products(products, chunk_size=len(products))
+    clusters = [{member["image_url"] for member in product["members"]} for product in canonical]
+    assert any({"https://img.example/a.jpg", "https://img.example/b.jpg"} <= cluster for cluster in clusters)
+
+
+def test_names_shorter_than_a_trigram_are_clustered():
+    products = [
+        {"name": "xy", "image_url": "https://img.example/1.jpg"},
+        {"name": "ab", "image_url": "https://img.example/2.jpg"},
+        {"name": "XY", "image_url": "https://img.example/3.jpg"},
+    ]
+    canonical, report = dedup_products(products)
+    assert [[member["image_url"] for member in product["members"]] for product in canonical] == [
+        ["https://img.example/1.jpg", "https://img.example/3.jpg"],
+        ["https://img.example/2.jpg"],
+    ]
+    assert report.by_name == 1
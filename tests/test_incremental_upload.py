@@ -0,0 +1,52 @@
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+pytest.importorskip("mongomock.gridfs").enable_gridfs_integration()
+
+from utils import catalog as catalog_module
+from utils.catalog import Catalog, catalog_sink, get_catalog, page_fingerprint, upload_scope
+from utils.mongo import upload_products
+
+SOURCE = "fslidingfeng.en.alibaba.com"
+CATEGORY = "Blow Molding Machines"
+PAGE = "https://fslidingfeng.en.alibaba.com/productgrouplist-822252468-1/Blow_Molding_Machines.html"
+
+
+@pytest.fixture(autouse=True)
+def catalog(tmp_path, monkeypatch):
+    catalog = Catalog(tmp_path / "catalog.sqlite3")
+    monkeypatch.setattr(catalog_module, "_catalog", catalog)
+    return catalog
+
+
+def incremental_scrape(products, body_hash):
+    """What one incremental UI scrape of ``PAGE`` hands to the upload: only the products the catalog had not seen."""
+    page_log = get_catalog().page_log(SOURCE, CATEGORY)
+    delta = page_log.new_products(products)
+    catalog_sink(SOURCE, CATEGORY, index_images=False)(delta)
+    page_log.record(PAGE, body_hash, page_fingerprint(products), products)
+    return delta
+
+
+def product(name):
+    return {"name": name, "image_url": ""}
+
+
+def test_products_of_a_skipped_upload_still_reach_atlas():
+    db = mongomock.MongoClient().productDB
+
+    # รอบแรกไม่ได้อัปโหลด (หรืออัปโหลดล้มเหลว)
+    assert incremental_scrape([product("Blow Molder A"), product("Blow Molder B")], "v1")
+    delta = incremental_scrape([product("Blow Molder A"), product("Blow Molder B"), product("Blow Molder C")], "v2")
+    assert delta == [product("Blow Molder C")]
+
+    upload_products(db, upload_scope(delta, SOURCE, CATEGORY, incremental=True),
+                    source=SOURCE, category=CATEGORY, mode="keep")
+    names = sorted(doc["name"] for doc in db["products"].find({"source": SOURCE, "category": CATEGORY}))
+    assert names == ["Blow Molder A", "Blow Molder B", "Blow Molder C"]
+
+
+def test_full_scrape_uploads_what_was_scraped():
+    scraped = [product("Blow Molder A")]
+    get_catalog().upsert([product("Blow Molder Z")], SOURCE, CATEGORY)
+    assert upload_scope(scraped, SOURCE, CATEGORY, incremental=False) is scraped
@@ -0,0 +1,35 @@
+import random
+
+from utils.matching import Blocker, name_key
+from utils.search import normalize
+
+WORDS = "automatic pet bottle blow molding machine filling capping labeling water juice semi full line plastic".split()
+
+
+def machine_names(count, seed=1):
+    """Alibaba-style listing names made only of the same few words."""
+    rng = random.Random(seed)
+    return [" ".join(rng.sample(WORDS, rng.randint(3, 7))) for _ in range(count)]
+
+
+def test_common_vocabulary_name_finds_its_exact_match():
+    names = [normalize(name) for name in machine_names(10000) + ["Automatic PET Bottle Blow Molding Machine"]]
+    candidates = Blocker(names).candidates("automatic pet bottle blow molding machine")
+    assert len(names) - 1 in candidates
+    assert name_key(names[candidates[0]]) == name_key(names[-1])
+
+
+def test_common_trigrams_are_a_fallback_only():
+    names = [normalize(name) for name in machine_names(10000)] + ["zq77 blow molding machine"]
+    candidates = Blocker(names).candidates("zq77 blow molding machine")
+    assert candidates == [len(names) - 1]
+
+
+def test_names_shorter_than_a_trigram_match_on_their_words():
+    blocker = Blocker(["xy", "ab", "xy"])
+    assert blocker.candidates("xy") == [0, 2]
+    assert blocker.candidates("zz") == []
+
+
+def test_name_key_ignores_word_order():
+    assert name_key("molding blow machine") == name_key("blow molding machine")
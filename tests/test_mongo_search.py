@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from utils import mongo
+from utils.mongo import count_products, ensure_search_indexes, query_products
+
+
+@pytest.fixture
+def collection():
+    mongo._indexed.clear()
+    collection = mongomock.MongoClient().productDB.products
+    now = datetime(2024, 1, 1)
+    # เอกสารเก่าไม่มี name_norm — ensure_search_indexes ต้องเติมให้
+    collection.insert_many([
+        {"name": "Bottle Mould B", "image_url": "b.jpg", "updated_at": now},
+        {"name": "bottle mould a", "image_url": "a.jpg", "updated_at": now + timedelta(days=2)},
+        {"name": "BOTTLE Capper", "image_url": "c.jpg", "updated_at": now + timedelta(days=1)},
+        {"name": "Label Roller", "image_url": "l.jpg", "updated_at": now + timedelta(days=3)},
+        {"name": "Bottle Washer", "image_url": "w.jpg", "updated_at": now + timedelta(days=4), "deleted": True},
+    ])
+    ensure_search_indexes(collection)
+    return collection
+
+
+def names(products):
+    return [product["name"] for product in products]
+
+
+def test_backfills_name_norm_and_creates_indexes(collection):
+    assert collection.count_documents({"name_norm": {"$exists": False}}) == 0
+    assert collection.find_one({"name": "BOTTLE Capper"})["name_norm"] == "bottle capper"
+    indexes = collection.index_information()
+    assert "name_norm_1" in indexes
+    assert "updated_at_-1" in indexes
+    assert "name_text" in indexes
+
+
+def test_ensure_search_indexes_runs_once_per_collection(collection):
+    collection.insert_one({"name": "Late Arrival"})
+    ensure_search_indexes(collection)
+    assert "name_norm" not in collection.find_one({"name": "Late Arrival"})
+
+
+def test_count_is_case_insensitive_and_skips_deleted(collection):
+    assert count_products(collection) == 4
+    assert count_products(collection, "bottle") == 3
+    assert count_products(collection, "MOULD") == 2
+    assert count_products(collection, "washer") == 0
+
+
+def test_query_treats_the_search_as_a_literal_substring(collection):
+    assert count_products(collection, "mould.") == 0
+    assert query_products(collection, "(") == []
+
+
+@pytest.mark.parametrize("sort, expected", [
+    ("🔤 Name (A→Z)", ["BOTTLE Capper", "bottle mould a", "Bottle Mould B"]),
+    ("🔤 Name (Z→A)", ["Bottle Mould B", "bottle mould a", "BOTTLE Capper"]),
+    ("🕒 Recently updated", ["bottle mould a", "BOTTLE Capper", "Bottle Mould B"]),
+])
+def test_query_sorts_on_the_server(collection, sort, expected):
+    assert names(query_products(collection, "bottle", sort=sort)) == expected
+
+
+def test_query_returns_only_the_requested_page(collection):
+    first = query_products(collection, skip=0, limit=3)
+    second = query_products(collection, skip=3, limit=3)
+    assert names(first) == ["BOTTLE Capper", "bottle mould a", "Bottle Mould B"]
+    assert names(second) == ["Label Roller"]
+    assert second == [{"name": "Label Roller", "image_url": "l.jpg"}]
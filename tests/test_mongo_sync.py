@@ -0,0 +1,65 @@
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+mongomock = pytest.importorskip("mongomock")
+pytest.importorskip("mongomock.gridfs").enable_gridfs_integration()
+
+from gridfs import GridFS
+
+from utils.mongo import load_products, upload_products
+
+SOURCE = "fslidingfeng.en.alibaba.com"
+
+
+def png(color):
+    data = BytesIO()
+    Image.new("RGB", (40, 40), color).save(data, format="PNG")
+    return data.getvalue()
+
+
+@pytest.fixture
+def legacy_db():
+    """A database written by the original upload: ObjectId ``_id``, no source/category."""
+    db = mongomock.MongoClient().productDB
+    fs = GridFS(db)
+    for name, color in (("Blow Molder A", "red"), ("Blow Molder B", "blue")):
+        db["products"].insert_one({
+            "name": name,
+            "image_url": f"https://img.example/{name[-1]}.jpg",
+            "image_file_id": fs.put(png(color), filename=f"{name}.png"),
+        })
+    return db
+
+
+def no_download(url):
+    raise AssertionError(f"downloaded {url}")
+
+
+@pytest.mark.parametrize("mode", ["soft", "prune", "keep"])
+def test_first_delta_sync_adopts_legacy_documents(legacy_db, mode):
+    products = [
+        {"name": "Blow Molder A", "image_url": "https://img.example/A.jpg"},
+        {"name": "Blow Molder C", "image_url": ""},
+    ]
+    report = upload_products(legacy_db, products, source=SOURCE, category="All", mode=mode, load_image=no_download)
+
+    assert report.adopted == 1
+    assert report.image_failed == 0
+    assert sorted(product["name"] for product in load_products(legacy_db["products"])) == [
+        "Blow Molder A", "Blow Molder B", "Blow Molder C"
+    ]
+    adopted = legacy_db["products"].find_one({"name": "Blow Molder A"})
+    assert adopted["source"] == SOURCE and adopted["thumbnails"]
+    assert GridFS(legacy_db).get(adopted["image_file_id"]).read() == png("red")
+    # ไฟล์ภาพเดิมของเอกสารที่ถูกรับช่วงต้องถูกลบ เหลือของ B กับของ A ที่เก็บใหม่ (ต้นฉบับ + thumbnails)
+    assert legacy_db.fs.files.count_documents({"metadata.sha256": {"$exists": False}}) == 1
+
+
+def test_later_syncs_find_nothing_left_to_adopt(legacy_db):
+    products = [{"name": "Blow Molder A", "image_url": "https://img.example/A.jpg"}]
+    upload_products(legacy_db, products, source=SOURCE, category="All", load_image=no_download)
+    report = upload_products(legacy_db, products, source=SOURCE, category="All", load_image=no_download)
+    assert report.adopted == 0
+    assert report.unchanged == 1
@@ -0,0 +1,393 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from utils.image_cache import url_image
+from utils.search import normalize
+from utils.vectors import VectorMatrix, describe_many
+
+CATALOG_PATH = Path(__file__).resolve().parent.parent / "data" / "catalog.sqlite3"
+
+SORT_ORDERS = {
+    "🔤 Name (A→Z)": "name_norm ASC",
+    "🔤 Name (Z→A)": "name_norm DESC",
+    "🕒 Recently updated": "updated_at DESC",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    category TEXT,
+    name TEXT NOT NULL,
+    name_norm TEXT NOT NULL,
+    image_url TEXT,
+    image_hash TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS products_scope ON products (source, category);
+CREATE TABLE IF NOT EXISTS vectors (
+    row INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE
+);
+CREATE INDEX IF NOT EXISTS products_name ON products (name_norm);
+CREATE TABLE IF NOT EXISTS pages (
+    scope TEXT NOT NULL,
+    url TEXT NOT NULL,
+    body_hash TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    products INTEGER NOT NULL,
+    checked_at REAL NOT NULL,
+    PRIMARY KEY (scope, url)
+);
+CREATE TABLE IF NOT EXISTS seen (
+    scope TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    PRIMARY KEY (scope, hash)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+    INSERT INTO products_fts (rowid, name_norm) VALUES (new.rowid, new.name_norm);
+END;
+CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+    INSERT INTO products_fts (products_fts, rowid, name_norm) VALUES ('delete', old.rowid, old.name_norm);
+END;
+CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE OF name_norm ON products BEGIN
+    INSERT INTO products_fts (products_fts, rowid, name_norm) VALUES ('delete', old.rowid, old.name_norm);
+    INSERT INTO products_fts (rowid, name_norm) VALUES (new.rowid, new.name_norm);
+END;
+"""
+
+# The trigram tokenizer (SQLite 3.34+) matches substrings in Thai and English alike;
+# older SQLite builds fall back to word tokens
+FTS_TABLES = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+    "name_norm, content='products', content_rowid='rowid', tokenize='trigram')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+    "name_norm, content='products', content_rowid='rowid')",
+]
+
+UPSERT = """
+INSERT INTO products (id, source, category, name, name_norm, image_url, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    name = excluded.name,
+    name_norm = excluded.name_norm,
+    image_hash = CASE WHEN image_url IS excluded.image_url THEN image_hash END,
+    image_url = excluded.image_url,
+    updated_at = excluded.updated_at
+"""
+
+
+# Indexing downloads every image, so it runs beside the scrape rather than in it
+_index_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="catalog-index")
+
+
+# -------------------- PRODUCT IDENTITY --------------------
+def product_id(product, source, category=None):
+    """Stable ``_id`` of a product within one ``source``/``category`` scope.
+
+    Name and image URL are both part of it, so two products sharing a photo
+    stay apart, and a product listed under "All" and under a category is
+    one row per scope rather than one row the scopes take from each other.
+    """
+    key = f"{product.get('name') or ''}|{product.get('image_url') or ''}"
+    return hashlib.sha1(f"{source}|{category or ''}|{key}".encode("utf-8")).hexdigest()
+
+
+def content_hash(product):
+    return hashlib.sha1(f"{product.get('name', '')}|{product.get('image_url') or ''}".encode("utf-8")).hexdigest()
+
+
+def page_fingerprint(products):
+    """Order-independent hash of a listing page's product block."""
+    return hashlib.sha1("\n".join(sorted(content_hash(product) for product in products)).encode("utf-8")).hexdigest()
+
+
+# -------------------- CATALOG --------------------
+class Catalog:
+    """Scraped products in a local SQLite file, readable without any network access.
+
+    Rows are keyed like the Atlas documents (``product_id``), so re-scraping a
+    page updates products in place. ``products_fts`` is an FTS5 index over the
+    normalized names kept in step by triggers; ``source``/``category`` and
+    ``name_norm`` have ordinary indexes for filtering and sorting.
+    Each thread gets its own connection, and WAL mode lets a background
+    scrape write while viewers read.
+
+    Image features for "similar photo" search live in a memory-mapped float32
+    matrix next to the database file; ``vectors`` maps its rows to products.
+    ``pages`` and ``seen`` hold the listing-page fingerprints behind ``page_log``.
+    """
+
+    def __init__(self, path=CATALOG_PATH):
+        self.path = Path(path)
+        self.vectors = VectorMatrix(self.path.with_suffix(".vectors.f32"))
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.connection() as conn:
+            conn.executescript("PRAGMA journal_mode=WAL;")
+            for statement in FTS_TABLES:
+                try:
+                    conn.execute(statement)
+                    break
+                except sqlite3.OperationalError:
+                    continue
+            conn.executescript(SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(products)")}
+            if "image_hash" not in columns:  # catalogs created before photo search
+                conn.execute("ALTER TABLE products ADD COLUMN image_hash TEXT")
+            if conn.execute("PRAGMA user_version").fetchone()[0] < 1:  # ids from before per-scope keys
+                renamed = [
+                    (product_id({"name": name, "image_url": image_url}, source, category), old)
+                    for old, source, category, name, image_url in conn.execute(
+                        "SELECT id, source, category, name, image_url FROM products"
+                    ).fetchall()
+                ]
+                conn.executemany("UPDATE products SET id = ? WHERE id = ?", renamed)
+                conn.executemany("UPDATE vectors SET id = ? WHERE id = ?", renamed)
+                conn.execute("PRAGMA user_version = 1")
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def upsert(self, products, source, category=None):
+        """Insert or update ``products`` under ``source``/``category``; returns the number of rows written."""
+        now = time.time()
+        rows = [
+            (product_id(product, source, category), source, category, product.get("name") or "",
+             normalize(product.get("name")), product.get("image_url"), now)
+            for product in products
+        ]
+        with self.connection() as conn:
+            conn.executemany(UPSERT, rows)
+        return len(rows)
+
+    def unindexed(self, limit=None):
+        """``(id, image_url)`` of products whose image has no hash or feature vector yet."""
+        return self.connection().execute(
+            "SELECT id, image_url FROM products WHERE image_url LIKE 'http%' AND (image_hash IS NULL "
+            "OR (image_hash != '' AND id NOT IN (SELECT id FROM vectors))) LIMIT ?",
+            (-1 if limit is None else limit,)
+        ).fetchall()
+
+    def index_images(self, rows, load_image=url_image, workers=1):
+        """Store the ``dhash`` and feature vector of each ``(id, image_url)``; returns how many were indexed.
+
+        Images that fail to download or decode get an empty hash so they are not retried.
+        """
+        def download(row):
+            try:
+                return load_image(row[1])
+            except Exception:
+                return None
+
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                images = list(pool.map(download, rows))
+        else:
+            images = [download(row) for row in rows]
+        described = describe_many([data or b"" for data in images])
+
+        indexed = [(row, result) for row, data, result in zip(rows, images, described) if data and result]
+        with self.connection() as conn:
+            conn.executemany(
+                "UPDATE products SET image_hash = ? WHERE id = ? AND image_url = ?",
+                [(result[0] if data and result else "", _id, image_url)
+                 for (_id, image_url), data, result in zip(rows, images, described)]
+            )
+            conn.executemany("INSERT OR IGNORE INTO vectors (id) VALUES (?)", [(row[0],) for row, _ in indexed])
+            positions = dict(conn.execute(
+                f"SELECT id, row FROM vectors WHERE id IN ({', '.join('?' * len(indexed))})",
+                [row[0] for row, _ in indexed]
+            ).fetchall()) if indexed else {}
+        self.vectors.write(
+            [positions[row[0]] for row, _ in indexed],
+            np.stack([result[1] for _, result in indexed]) if indexed else []
+        )
+        return len(indexed)
+
+    def index_products(self, products, source, category=None):
+        """Index the images of freshly scraped ``products`` that the catalog has not indexed yet."""
+        ids = [product_id(product, source, category) for product in products]
+        placeholders = ", ".join("?" * len(ids))
+        rows = self.connection().execute(
+            f"SELECT id, image_url FROM products WHERE id IN ({placeholders}) "
+            "AND image_hash IS NULL AND image_url LIKE 'http%'", ids
+        ).fetchall()
+        return self.index_images(rows)
+
+    def similar(self, vector, k=20, fields=("name", "image_url", "image_hash")):
+        """``(product, cosine)`` for the ``k`` products whose image features are closest to ``vector``."""
+        count = self.connection().execute("SELECT COALESCE(MAX(row) + 1, 0) FROM vectors").fetchone()[0]
+        rows, scores = self.vectors.search(vector, k, count)
+        if not len(rows):
+            return []
+        rows = [int(row) for row in rows]
+        found = {
+            record[0]: dict(zip(fields, record[1:]))
+            for record in self.connection().execute(
+                f"SELECT v.row, {', '.join('p.' + field for field in fields)} FROM vectors v "
+                f"JOIN products p ON p.id = v.id WHERE v.row IN ({', '.join('?' * len(rows))})", rows
+            )
+        }
+        return [(found[row], float(score)) for row, score in zip(rows, scores) if row in found]
+
+    def page_log(self, source, category=None, target="catalog", deferred=False):
+        return PageLog(self, source, category, target, deferred)
+
+    def scopes(self):
+        """``(source, category, count)`` for every scope in the catalog."""
+        return self.connection().execute(
+            "SELECT source, category, COUNT(*) FROM products GROUP BY source, category ORDER BY source, category"
+        ).fetchall()
+
+    def _where(self, query="", source=None, category=None):
+        clauses, params = [], []
+        if source is not None:
+            clauses.append("source = ?")
+            params.append(source)
+        if category is not None:
+            clauses.append("category = ?")
+            params.append(category)
+        query = normalize(query)
+        if len(query) >= 3:
+            # Quoted as one FTS5 string, then confirmed as a real substring of the name
+            clauses.append("rowid IN (SELECT rowid FROM products_fts WHERE products_fts MATCH ?) AND instr(name_norm, ?) > 0")
+            params += ['"' + query.replace('"', '""') + '"', query]
+        elif query:
+            clauses.append("instr(name_norm, ?) > 0")
+            params.append(query)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def load(self, source=None, category=None, fields=("name", "image_url")):
+        """Every product of a scope (all of them by default) as a list of dicts, in insertion order."""
+        where, params = self._where(source=source, category=category)
+        cursor = self.connection().execute(f"SELECT {', '.join(fields)} FROM products{where} ORDER BY rowid", params)
+        return [dict(zip(fields, row)) for row in cursor]
+
+    def count(self, query="", source=None, category=None):
+        where, params = self._where(query, source, category)
+        return self.connection().execute(f"SELECT COUNT(*) FROM products{where}", params).fetchone()[0]
+
+    def query(self, query="", skip=0, limit=20, sort="🔤 Name (A→Z)", source=None, category=None,
+              fields=("name", "image_url")):
+        """One page of matching products, filtered, sorted and windowed by SQLite."""
+        where, params = self._where(query, source, category)
+        cursor = self.connection().execute(
+            f"SELECT {', '.join(fields)} FROM products{where} ORDER BY {SORT_ORDERS[sort]} LIMIT ? OFFSET ?",
+            params + [limit, skip]
+        )
+        return [dict(zip(fields, row)) for row in cursor]
+
+
+class PageLog:
+    """What earlier scrapes of one ``source``/``category`` delivered to ``target``, for incremental re-scrapes.
+
+    ``pages`` keeps each listing page's body hash and ``page_fingerprint``;
+    ``seen`` keeps the ``content_hash`` of every product already emitted, so
+    a product that only moved to another page is not emitted again. Each
+    destination ("catalog", "mongo") has its own log, so delivering to one
+    does not hide products from the other.
+
+    ``record`` writes at once, which suits a sink that stores every page as
+    it arrives. A ``deferred`` log only buffers until ``flush``, for callers
+    that write the products somewhere after the scrape has finished.
+    """
+
+    def __init__(self, catalog, source, category=None, target="catalog", deferred=False):
+        self.catalog = catalog
+        self.scope = f"{target}|{source}|{category or ''}"
+        self.deferred = deferred
+        self._pending = []
+
+    def unchanged(self, url, body_hash):
+        """``(fingerprint, product count)`` stored for ``url`` if its body is byte-identical, else None."""
+        return self.catalog.connection().execute(
+            "SELECT fingerprint, products FROM pages WHERE scope = ? AND url = ? AND body_hash = ?",
+            (self.scope, url, body_hash)
+        ).fetchone()
+
+    def new_products(self, products):
+        """The ``products`` whose name/image pair no earlier scrape of this scope emitted."""
+        hashes = [content_hash(product) for product in products]
+        if not hashes:
+            return []
+        seen = {
+            row[0] for row in self.catalog.connection().execute(
+                f"SELECT hash FROM seen WHERE scope = ? AND hash IN ({', '.join('?' * len(hashes))})",
+                [self.scope] + hashes
+            )
+        }
+        return [product for product, digest in zip(products, hashes) if digest not in seen]
+
+    def record(self, url, body_hash, fingerprint, products):
+        self._pending.append((url, body_hash, fingerprint, products, time.time()))
+        if not self.deferred:
+            self.flush()
+
+    def flush(self):
+        """Write the recorded pages; call once their products reached the target."""
+        pending, self._pending = self._pending, []
+        with self.catalog.connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO pages (scope, url, body_hash, fingerprint, products, checked_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(self.scope, url, body_hash, fingerprint, len(products), checked_at)
+                 for url, body_hash, fingerprint, products, checked_at in pending]
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO seen (scope, hash) VALUES (?, ?)",
+                [(self.scope, content_hash(product)) for *_, products, _ in pending for product in products]
+            )
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    """Process-wide ``Catalog`` at ``CATALOG_PATH``."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = Catalog()
+    return _catalog
+
+
+def catalog_sink(source, category=None, index_images=True):
+    """A ``ScrapeJob`` sink that writes every scraped page into the local catalog.
+
+    With ``index_images`` the page's images are then hashed and described for
+    photo search on a background pool, without holding up the scrape.
+    """
+    def sink(products):
+        catalog = get_catalog()
+        catalog.upsert(products, source, category)
+        if index_images and products:
+            _index_pool.submit(catalog.index_products, products, source, category)
+    return sink
+
+
+def upload_scope(products, source, category=None, incremental=False):
+    """The products an Atlas upload after a scrape should send.
+
+    An incremental scrape only returns what the catalog had not seen yet,
+    and the catalog marks it seen once stored. Uploading just that delta
+    would lose it for good when the upload is skipped or fails, so after an
+    incremental scrape the whole scope is read back from the catalog and
+    the upload leaves unchanged products alone.
+    """
+    if not incremental:
+        return products
+    return get_catalog().load(source, category)
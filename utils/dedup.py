@@ -0,0 +1,162 @@
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from utils.matching import Blocker, name_key
+from utils.search import normalize
+
+NAME_CUTOFF = 92
+CHUNK_SIZE = 2000
+# Listing thumbnails of one photo differ only by a size suffix, e.g. "..._220x220.jpg"
+SIZE_SUFFIX = re.compile(r"_\d+x\d+[^/]*$")
+DIGITS = re.compile(r"\d+")
+
+
+def image_key(url):
+    """The image URL without query string or CDN size suffix, or None when there is no image."""
+    if not url or not url.startswith("http"):
+        return None
+    parts = urlsplit(url)
+    return f"{parts.netloc}{SIZE_SUFFIX.sub('', parts.path)}"
+
+
+class UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+        self.size = [1] * size
+
+    def find(self, item):
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+
+
+# -------------------- WORKERS --------------------
+_worker = {}
+
+
+def _init_worker(names):
+    _worker["blocker"] = Blocker(names)
+    _worker["digits"] = [tuple(DIGITS.findall(name)) for name in names]
+    # token_sort_ratio is ratio over sorted tokens; sorting once here keeps cdist on plain ratio
+    _worker["sorted"] = np.array([name_key(name) for name in names], dtype=object)
+
+
+def _name_pairs(start, stop, cutoff):
+    """``(i, j)`` pairs with ``i < j`` among names ``start:stop`` whose names score at least ``cutoff``."""
+    blocker, digits, tokens = _worker["blocker"], _worker["digits"], _worker["sorted"]
+    pairs = []
+    for i in range(start, stop):
+        candidates = np.array(blocker.candidates(blocker.names[i]), dtype=np.int64)
+        # Names with the same words were already linked before fuzzy scoring
+        candidates = candidates[(candidates > i) & (tokens[candidates] != tokens[i])]
+        if not len(candidates):
+            continue
+        scores = process.cdist(
+            [tokens[i]], tokens[candidates].tolist(), scorer=fuzz.ratio, score_cutoff=cutoff, dtype=np.uint8
+        )[0]
+        # Same words but another part number ("E7908" / "E7909") is a different product
+        pairs.extend((i, int(j)) for j in candidates[scores >= cutoff] if digits[j] == digits[i])
+    return pairs
+
+
+# -------------------- DEDUP --------------------
+class DedupReport:
+    def __init__(self, total):
+        self.total = total
+        self.clusters = 0
+        self.by_image = 0
+        self.by_name = 0
+        self.seconds = 0.0
+
+    def summary(self):
+        return (
+            f"🧹 {self.total} products → {self.clusters} unique · "
+            f"{self.by_image} image and {self.by_name} name links · {self.seconds:.1f}s"
+        )
+
+
+def dedup_products(products, name_cutoff=NAME_CUTOFF, workers=None, chunk_size=CHUNK_SIZE):
+    """Cluster near-duplicate products; returns ``(canonical, DedupReport)``.
+
+    Products are linked when they share an image (``image_key``), have the
+    same words in their names (``name_key``), or their names score at least
+    ``name_cutoff`` (``token_sort_ratio``) with the same digits; linked
+    products form one cluster via union-find. Each canonical
+    product is the first-scraped member with an image (else the first member)
+    plus a ``members`` list of every product in its cluster, in scrape order.
+    Name pairs are scored on a process pool for catalogs larger than one chunk.
+    """
+    report = DedupReport(len(products))
+    started = time.monotonic()
+    clusters = UnionFind(len(products))
+
+    first_with_image = {}
+    for position, product in enumerate(products):
+        key = image_key(product.get("image_url"))
+        if key is None:
+            continue
+        if key in first_with_image:
+            clusters.union(first_with_image[key], position)
+            report.by_image += 1
+        else:
+            first_with_image[key] = position
+
+    names = [normalize(product.get("name")) for product in products]
+    first_with_name = {}
+    for position, name in enumerate(names):
+        key = name_key(name)
+        if not key:
+            continue
+        if key in first_with_name:
+            clusters.union(first_with_name[key], position)
+            report.by_name += 1
+        else:
+            first_with_name[key] = position
+
+    chunks = [(start, min(start + chunk_size, len(names)), name_cutoff) for start in range(0, len(names), chunk_size)]
+    if len(chunks) > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count(), mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker, initargs=(names,)
+        ) as pool:
+            results = pool.map(_name_pairs, *zip(*chunks))
+            pairs = [pair for chunk in results for pair in chunk]
+    else:
+        _init_worker(names)
+        pairs = [pair for chunk in chunks for pair in _name_pairs(*chunk)]
+        _worker.clear()
+    for i, j in pairs:
+        clusters.union(i, j)
+    report.by_name += len(pairs)
+
+    members = {}
+    for position in range(len(products)):
+        members.setdefault(clusters.find(position), []).append(position)
+
+    canonical = []
+    for positions in members.values():
+        head = next((p for p in positions if image_key(products[p].get("image_url"))), positions[0])
+        canonical.append({**products[head], "members": [products[p] for p in positions]})
+    report.clusters = len(canonical)
+    report.seconds = time.monotonic() - started
+    return canonical, report
+
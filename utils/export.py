@@ -0,0 +1,238 @@
+import csv
+import os
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+import xlsxwriter
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = None
+
+EXPORT_DIR = Path(__file__).resolve().parent.parent / ".cache" / "exports"
+EXPORT_TTL = 3600
+CHUNK_ROWS = 5000
+# xlsxwriter keeps every inserted image in memory until close(), even in constant_memory mode
+STREAMING_IMAGE_BYTES = 64 * 1024 * 1024
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+class ExportReport:
+    def __init__(self, total):
+        self.total = total
+        self.embedded = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.over_budget = 0
+        self.started_at = time.monotonic()
+        self.seconds = 0.0
+
+    def summary(self):
+        budget = f" · {self.over_budget} left out over the image memory budget" if self.over_budget else ""
+        return (
+            f"🖼️ {self.embedded}/{self.total} images embedded · {self.failed} failed · "
+            f"{self.timed_out} skipped after deadline{budget} · {self.seconds:.1f}s"
+        )
+
+
+def _load(load_thumbnail, product):
+    try:
+        return load_thumbnail(product)
+    except Exception:
+        return None
+
+
+def export_path(suffix):
+    """A fresh file under ``EXPORT_DIR``; exports older than ``EXPORT_TTL`` are swept first."""
+    EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+    cutoff = time.time() - EXPORT_TTL
+    for old in EXPORT_DIR.iterdir():
+        try:
+            if old.stat().st_mtime < cutoff:
+                old.unlink()
+        except OSError:
+            pass
+    handle, path = tempfile.mkstemp(suffix=suffix, dir=EXPORT_DIR)
+    os.close(handle)
+    return path
+
+
+# Placeholder for rows reached after the deadline: their thumbnail is never requested
+TIMED_OUT = object()
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def write_excel(products, load_thumbnail, path=None, max_workers=8, deadline=300, progress=None, max_image_bytes=None):
+    """Build the products workbook; returns ``(output, ExportReport)``.
+
+    Without ``path`` the workbook is built in a ``BytesIO``. With ``path`` it
+    is written there in xlsxwriter's ``constant_memory`` mode, which flushes
+    each row's cells to disk as soon as the next one starts. Embedded images
+    are not flushed: xlsxwriter holds them until ``close()``, so once
+    ``max_image_bytes`` of thumbnails are embedded the remaining rows are
+    written without images (``report.over_budget``).
+
+    ``load_thumbnail(product)`` returns PNG bytes and runs on a worker pool
+    with a bounded number of rows in flight. Rows are still written in order.
+    A failing image leaves its cell empty, and once ``deadline`` seconds have
+    passed the remaining rows are written without images.
+    ``progress(done, total)`` is called after every row.
+    """
+    report = ExportReport(len(products))
+    deadline_at = report.started_at + deadline
+
+    if path is None:
+        output = BytesIO()
+        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+    else:
+        output = path
+        workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'tmpdir': str(EXPORT_DIR)})
+    worksheet = workbook.add_worksheet("Products")
+
+    worksheet.write("A1", "Product Name")
+    worksheet.write("B1", "Image URL")
+    worksheet.write("C1", "Image")
+
+    window = max_workers * 4
+    rows = iter(products)
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    pending = deque()
+    image_bytes = 0
+
+    def submit(product):
+        if time.monotonic() >= deadline_at:
+            return TIMED_OUT
+        if max_image_bytes is not None and image_bytes >= max_image_bytes:
+            return None
+        return pool.submit(_load, load_thumbnail, product)
+
+    try:
+        for product in rows:
+            pending.append((product, submit(product)))
+            if len(pending) >= window:
+                break
+
+        row = 1
+        while pending:
+            product, future = pending.popleft()
+            next_product = next(rows, None)
+            if next_product is not None:
+                pending.append((next_product, submit(next_product)))
+
+            worksheet.write(row, 0, product["name"])
+            worksheet.write(row, 1, product["image_url"])
+
+            try:
+                if future is TIMED_OUT:
+                    raise TimeoutError
+                thumbnail = future.result(timeout=max(0.0, deadline_at - time.monotonic())) if future else None
+            except TimeoutError:
+                if future is not TIMED_OUT:
+                    future.cancel()
+                report.timed_out += 1
+            else:
+                if future is None or (max_image_bytes is not None and image_bytes >= max_image_bytes):
+                    report.over_budget += 1
+                elif thumbnail:
+                    worksheet.insert_image(row, 2, product["name"] + ".png", {
+                        'image_data': BytesIO(thumbnail),
+                        'x_scale': 1,
+                        'y_scale': 1
+                    })
+                    image_bytes += len(thumbnail)
+                    report.embedded += 1
+                else:
+                    report.failed += 1
+
+            if progress:
+                progress(row, report.total)
+            row += 1
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    workbook.close()
+    if path is None:
+        output.seek(0)
+    report.seconds = time.monotonic() - report.started_at
+    return output, report
+
+
+def _chunks(products, size):
+    for start in range(0, len(products), size):
+        yield products[start:start + size]
+
+
+def write_csv(products, path, columns=("name", "image_url"), chunk_size=CHUNK_ROWS):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(columns), extrasaction="ignore")
+        writer.writeheader()
+        for chunk in _chunks(products, chunk_size):
+            writer.writerows(chunk)
+    return path
+
+
+def write_parquet(products, path, columns=("name", "image_url"), chunk_size=CHUNK_ROWS * 10):
+    schema = pa.schema([(column, pa.string()) for column in columns])
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in _chunks(products, chunk_size):
+            table = pa.table({column: [p.get(column) for p in chunk] for column in columns}, schema=schema)
+            writer.write_table(table)
+    return path
+
+
+# -------------------- SIDEBAR --------------------
+def render_export_sidebar(products, load_thumbnail, csv_columns=("name", "image_url")):
+    """Draw the CSV / Excel (/ Parquet) export buttons; returns True if a download is ready."""
+    streaming = st.sidebar.checkbox(
+        "🧊 Streaming export (large catalogs)", value=False,
+        help="Write exports to a temp file in fixed-size chunks instead of building them in memory. "
+             f"Excel embeds at most {STREAMING_IMAGE_BYTES // (1024 * 1024)} MB of images this way."
+    )
+    ready = False
+
+    if st.sidebar.button("📥 Download CSV"):
+        if streaming:
+            data = _read(write_csv(products, export_path(".csv"), csv_columns))
+        else:
+            data = pd.DataFrame(products, columns=list(csv_columns)).to_csv(index=False).encode('utf-8')
+        st.sidebar.download_button("Save CSV File", data=data, file_name="products.csv", mime="text/csv")
+        ready = True
+
+    if st.sidebar.button("📥 Download Excel"):
+        export_progress = st.sidebar.progress(0.0, text="Preparing images...")
+        output, report = write_excel(
+            products,
+            load_thumbnail,
+            path=export_path(".xlsx") if streaming else None,
+            max_image_bytes=STREAMING_IMAGE_BYTES if streaming else None,
+            progress=lambda done, total: export_progress.progress(done / total, text=f"🖼️ {done}/{total} rows")
+        )
+        st.sidebar.caption(report.summary())
+        st.sidebar.download_button(
+            label="Save Excel File",
+            data=_read(output) if streaming else output,
+            file_name="products_with_images.xlsx",
+            mime=XLSX_MIME
+        )
+        ready = True
+
+    if pa is not None and st.sidebar.button("📥 Download Parquet"):
+        data = _read(write_parquet(products, export_path(".parquet"), csv_columns))
+        st.sidebar.download_button(
+            "Save Parquet File", data=data, file_name="products.parquet", mime="application/octet-stream"
+        )
+        ready = True
+
+    return ready
@@ -0,0 +1,113 @@
+import time
+from urllib.parse import urljoin
+
+from lxml import etree, html
+
+
+# -------------------- PAGE LAYOUTS --------------------
+class PageLayout:
+    """Compiled selectors for one listing-page layout.
+
+    ``container`` is evaluated once from the document root; ``cards`` and the
+    image/name selectors are relative, so each page costs one root search plus
+    one short walk per product card. Image and name selectors are tried in
+    order until one matches.
+    """
+
+    def __init__(self, container, cards, image, name, require_image=True):
+        self.container = etree.XPath(container)
+        self.cards = etree.XPath(cards)
+        self.image = [etree.XPath(xpath) for xpath in image]
+        self.name = [etree.XPath(xpath) for xpath in name]
+        self.require_image = require_image
+
+
+def _first_match(selectors, element):
+    for selector in selectors:
+        result = selector(element)
+        if result:
+            return result
+    return []
+
+
+LAYOUTS = {
+    # hsc-spareparts.com/products/N.html (Web_Scraping_1)
+    "hsc": PageLayout(
+        container='//*[@id="plist"]',
+        cards="./div[3]/div",
+        image=["./div[1]/a/img/@src"],
+        name=["./div[2]/a[1]//text()"],
+    ),
+    # fslidingfeng.en.alibaba.com/productlist-N.html gallery-off list (Web_Scraping_2-1 / 2-2)
+    "alibaba_list": PageLayout(
+        container='//*[@id="8919138061"]',
+        cards="./div/div/div/div/div[2]/div/div",
+        image=["./a/div/img/@src", ".//a/div/img/@src"],
+        name=["./div[1]//text()", ".//div[1]//text()"],
+    ),
+    # fslidingfeng.en.alibaba.com category pages laid out as rows of columns (Web_Scraping_2-3)
+    "alibaba_category": PageLayout(
+        container='//*[@id="8919138061"]',
+        cards="./div/div/div/div/div[2]/div/div/div",
+        image=[
+            './/img[contains(@class, "react-dove-image")]/@src | .//img/@src',
+            './/div[contains(@class, "react-dove-placeholder")]//img/@src',
+        ],
+        name=[
+            ".//div[1]//text()",
+            './/div[contains(@class, "title")]//span/text()',
+        ],
+        require_image=False,
+    ),
+}
+
+
+# -------------------- EXTRACTION --------------------
+def extract_products(tree, layout, page_url):
+    products = []
+    for container in layout.container(tree)[:1]:
+        for card in layout.cards(container):
+            name_element = _first_match(layout.name, card)
+            if not name_element:
+                continue
+            image_element = _first_match(layout.image, card)
+            if not image_element and layout.require_image:
+                continue
+
+            products.append({
+                "name": "".join(name_element).strip(),
+                "image_url": urljoin(page_url, image_element[0]) if image_element else None
+            })
+    return products
+
+
+def parse_page(content, layout, page_url):
+    """Parse one listing page; returns ``(products, seconds spent parsing)``."""
+    started = time.perf_counter()
+    tree = html.fromstring(content)
+    products = extract_products(tree, layout, page_url)
+    return products, time.perf_counter() - started
+
+
+class ParseStats:
+    def __init__(self):
+        self.pages = 0
+        self.seconds = 0.0
+        self.slowest = 0.0
+        self.unchanged = 0
+
+    def add(self, seconds):
+        if seconds is None:  # unchanged since the last scrape, not parsed
+            self.unchanged += 1
+            return
+        self.pages += 1
+        self.seconds += seconds
+        self.slowest = max(self.slowest, seconds)
+
+    def summary(self):
+        average = self.seconds / self.pages if self.pages else 0.0
+        skipped = f" · {self.unchanged} unchanged pages skipped" if self.unchanged else ""
+        return (
+            f"⏱️ Parsed {self.pages} pages in {self.seconds * 1000:.0f} ms "
+            f"(avg {average * 1000:.1f} ms/page, slowest {self.slowest * 1000:.1f} ms){skipped}"
+        )
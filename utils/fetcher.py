@@ -0,0 +1,82 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from utils.http_cache import cached_get
+
+
+# -------------------- PER-HOST BUDGET --------------------
+class HostRateLimiter:
+    """Keeps at most ``max_per_host`` requests open per host and spaces their
+    start times ``min_delay``..``max_delay`` seconds apart."""
+
+    def __init__(self, min_delay=0.0, max_delay=None, max_per_host=2):
+        self.min_delay = min_delay
+        self.max_delay = min_delay if max_delay is None else max_delay
+        self.max_per_host = max_per_host
+        self._lock = threading.Lock()
+        self._next_start = {}
+        self._slots = {}
+
+    def _slot(self, host):
+        with self._lock:
+            if host not in self._slots:
+                self._slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._slots[host]
+
+    def _wait_turn(self, host):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(host, now))
+            self._next_start[host] = start + random.uniform(self.min_delay, self.max_delay)
+        time.sleep(max(0.0, start - time.monotonic()))
+
+    @contextmanager
+    def acquire(self, url):
+        host = urlsplit(url).netloc
+        with self._slot(host):
+            self._wait_turn(host)
+            yield
+
+
+# -------------------- CONCURRENT FETCH --------------------
+def fetch_pages(urls, headers=None, max_workers=4, limiter=None, timeout=30, get=None):
+    """Fetch ``urls`` with up to ``max_workers`` requests in flight.
+
+    Responses are yielded as ``(url, response)`` in the same order as ``urls``,
+    so callers can parse pages exactly as they did in the serial loop.
+    Requests go through the shared pooled session and conditional-GET cache.
+    HTTP errors are raised when their page comes up, like ``raise_for_status``.
+    """
+    limiter = limiter or HostRateLimiter()
+    get = get or cached_get
+
+    def fetch(url):
+        with limiter.acquire(url):
+            response = get(url, headers=headers, timeout=timeout)
+        response.raise_for_status()
+        return response
+
+    # Keep a small backlog beyond the workers so a slow head page doesn't drain the pool
+    window = max_workers * 2
+    urls = iter(urls)
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    pending = deque()
+    try:
+        for url in urls:
+            pending.append((url, pool.submit(fetch, url)))
+            if len(pending) >= window:
+                break
+
+        while pending:
+            url, future = pending.popleft()
+            next_url = next(urls, None)
+            if next_url is not None:
+                pending.append((next_url, pool.submit(fetch, next_url)))
+            yield url, future.result()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
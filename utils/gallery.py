@@ -0,0 +1,151 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from utils.image_cache import url_thumbnail
+from utils.catalog import get_catalog
+from utils.image_hash import dhash, get_hash_index
+from utils.vectors import image_features
+
+PAGE_SIZES = [10, 20, 40, 80]
+
+# Shared by every session: one pool warms the visible page before it is drawn,
+# the other prefetches the next page in the background and never blocks a rerun
+_load_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="gallery-load")
+_prefetch_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="gallery-prefetch")
+
+
+def _prefetch(load, product):
+    try:
+        load(product)
+    except Exception:
+        pass
+
+
+def page_controls(total, key, default_page_size=20):
+    """Render page-size / jump-to-page controls for ``total`` items; returns ``(start, page_size)``."""
+    size_key, page_key = f"{key}_page_size", f"{key}_page"
+    controls = st.columns([1, 1, 2])
+    page_size = controls[0].selectbox(
+        "Items per page", PAGE_SIZES, index=PAGE_SIZES.index(default_page_size), key=size_key
+    )
+    total_pages = max(1, math.ceil(total / page_size))
+
+    # Clamp before the widget is created: the filter may have shrunk the result set
+    st.session_state[page_key] = min(max(1, st.session_state.get(page_key, 1)), total_pages)
+    page = controls[1].number_input("Page", min_value=1, max_value=total_pages, step=1, key=page_key)
+
+    start = (page - 1) * page_size
+    end = min(start + page_size, total)
+    controls[2].caption(f"Showing {start + 1 if total else 0}–{end} of {total} products · page {page}/{total_pages}")
+    return start, page_size
+
+
+def paginate(items, key, default_page_size=20):
+    """Paging controls over an in-memory list; returns ``(visible, next_page)`` slices."""
+    start, page_size = page_controls(len(items), key, default_page_size)
+    end = start + page_size
+    return items[start:end], items[end:end + page_size]
+
+
+def _render_grid(visible, render_item, columns, prefetch):
+    if prefetch:
+        list(_load_pool.map(lambda product: _prefetch(prefetch, product), visible))
+
+    for i in range(0, len(visible), columns):
+        cols = st.columns(columns)
+        for j, product in enumerate(visible[i:i + columns]):
+            with cols[j]:
+                render_item(product)
+
+
+def render_gallery(products, render_item, columns=5, key="gallery", prefetch=None):
+    """Render only the current page of ``products`` in a grid.
+
+    ``render_item(product)`` draws one cell. ``prefetch(product)``, if given,
+    loads the visible page in parallel before drawing and is then run on a
+    background pool for the next page so flipping forward is warm.
+    """
+    visible, upcoming = paginate(products, key)
+    _render_grid(visible, render_item, columns, prefetch)
+
+    if prefetch:
+        for product in upcoming:
+            _prefetch_pool.submit(_prefetch, prefetch, product)
+
+
+def render_remote_gallery(count, fetch_page, render_item, columns=5, key="gallery", prefetch=None):
+    """Like ``render_gallery`` for results that live on a server.
+
+    ``count()`` returns the number of matches and ``fetch_page(skip, limit)``
+    only the products of the visible page, which is also what this returns.
+    """
+    start, page_size = page_controls(count(), key)
+    visible = fetch_page(start, page_size)
+    _render_grid(visible, render_item, columns, prefetch)
+    return visible
+
+
+def _render_matches(matches, render_item, columns, caption):
+    for i in range(0, len(matches), columns):
+        cols = st.columns(columns)
+        for j, (product, score) in enumerate(matches[i:i + columns]):
+            with cols[j]:
+                render_item(product)
+                st.caption(caption(score))
+
+
+def render_photo_search(products, render_item, columns=5, key="photo_search", similar=0):
+    """Sidebar photo upload showing near-duplicates by ``image_hash`` among ``products``.
+
+    With ``similar`` it then shows that many best-looking matches from the
+    local catalog's feature vectors; only pass it when ``products`` came from
+    the local catalog, since Atlas uploads store no feature vectors.
+    """
+    photo = st.sidebar.file_uploader("📷 Find products by photo", type=["jpg", "jpeg", "png", "webp"], key=key)
+    if photo is None:
+        return
+
+    try:
+        photo_hash = dhash(photo.getvalue())
+        features = image_features(photo.getvalue()) if similar else None
+    except Exception as e:
+        st.warning(f"⚠️ Could not read the photo: {e}")
+        return
+
+    index = get_hash_index(st.session_state, products)
+    st.markdown("### 📷 Closest Products to Your Photo")
+    if not len(index):
+        st.info("No product images have been hashed yet — upload or re-scrape products to index their images.")
+    else:
+        matches = index.search(photo_hash)
+        st.caption(f"{len(matches)} near-duplicates among {len(index)} hashed images")
+        _render_matches(matches, render_item, columns, lambda distance: f"🧬 {distance}/64 bits apart")
+
+    if similar:
+        st.markdown("### 🎨 Similar-Looking Products (local catalog)")
+        matches = get_catalog().similar(features, k=similar)
+        if not matches:
+            st.info("No catalog images have been indexed yet — click 🧮 Index catalog images for photo search first.")
+        _render_matches(matches, render_item, columns, lambda cosine: f"🎨 {cosine:.0%} similar")
+
+
+# -------------------- IMAGE-URL PRODUCTS --------------------
+def prefetch_url_product(product, width=120):
+    image_url = product.get("image_url")
+    if image_url and image_url.startswith("http"):
+        url_thumbnail(image_url, size=width)
+
+
+def render_url_product(product, width=120):
+    image_url = product.get("image_url")
+    if image_url and image_url.startswith("http"):
+        try:
+            st.image(url_thumbnail(image_url, size=width), caption=product["name"], width=width)
+        except Exception as e:
+            st.warning(f"⚠️ Failed to load image: {e}")
+            st.write(f"**{product['name']}**")
+    else:
+        st.caption("🚫 No image available")
+        st.write(f"**{product['name']}**")
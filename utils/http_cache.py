@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache" / "http"
+STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Date")
+
+
+# -------------------- POOLED SESSION --------------------
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session(pool_size=32):
+    """Process-wide ``requests.Session`` so listing pages and images reuse keep-alive connections."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            retries = Retry(total=2, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=pool_size, max_retries=retries)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+    return _session
+
+
+# -------------------- CONDITIONAL-GET CACHE --------------------
+class HttpCache:
+    """On-disk cache of GET bodies that revalidates with ETag / Last-Modified."""
+
+    def __init__(self, directory=CACHE_DIR):
+        self.directory = Path(directory)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        folder = self.directory / key[:2]
+        return folder / f"{key}.json", folder / f"{key}.body"
+
+    def _load(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            body = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None, None
+        return meta, body
+
+    def _store(self, url, response):
+        meta_path, body_path = self._paths(url)
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "url": url,
+            "fetched_at": time.time(),
+            "headers": {k: response.headers[k] for k in STORED_HEADERS if k in response.headers},
+        }
+        # Write to temp files first so concurrent readers never see half a body
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        body_tmp = body_path.with_name(body_path.name + suffix)
+        meta_tmp = meta_path.with_name(meta_path.name + suffix)
+        body_tmp.write_bytes(response.content)
+        meta_tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(body_tmp, body_path)
+        os.replace(meta_tmp, meta_path)
+
+    def _touch(self, url, meta):
+        meta_path, _ = self._paths(url)
+        meta["fetched_at"] = time.time()
+        tmp = meta_path.with_name(meta_path.name + f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, meta_path)
+
+    @staticmethod
+    def _from_disk(url, meta, body):
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = body
+        response.headers = CaseInsensitiveDict(meta.get("headers", {}))
+        response.from_cache = True
+        return response
+
+    def get(self, url, headers=None, timeout=30, max_age=0, session=None):
+        """GET ``url``; a 304 or an entry younger than ``max_age`` seconds is served from disk.
+
+        The returned response has ``from_cache`` set so callers can tell whether
+        the body actually crossed the network.
+        """
+        meta, body = self._load(url)
+        if meta is not None and max_age and time.time() - meta["fetched_at"] < max_age:
+            return self._from_disk(url, meta, body)
+
+        request_headers = dict(headers or {})
+        if meta is not None:
+            stored = meta.get("headers", {})
+            if "ETag" in stored:
+                request_headers["If-None-Match"] = stored["ETag"]
+            if "Last-Modified" in stored:
+                request_headers["If-Modified-Since"] = stored["Last-Modified"]
+
+        session = session or get_session()
+        response = session.get(url, headers=request_headers, timeout=timeout)
+        if response.status_code == 304 and meta is not None:
+            self._touch(url, meta)
+            return self._from_disk(url, meta, body)
+
+        response.from_cache = False
+        if response.status_code == 200:
+            try:
+                self._store(url, response)
+            except OSError:
+                pass
+        return response
+
+
+default_cache = HttpCache()
+
+
+def cached_get(url, headers=None, timeout=30, max_age=0):
+    return default_cache.get(url, headers=headers, timeout=timeout, max_age=max_age)
+
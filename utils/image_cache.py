@@ -0,0 +1,162 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+
+from utils.http_cache import get_session
+from utils.thumbnails import thumbnail
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache" / "images"
+MAX_DISK_BYTES = 512 * 1024 * 1024
+MEMORY_BYTES = 64 * 1024 * 1024
+
+
+class ImageCache:
+    """Content-addressed image bytes, shared by every session in the process.
+
+    Entries are keyed by a hash of their source (``url:...`` or ``gridfs:...``)
+    and live in an in-memory LRU bounded by ``memory_bytes`` in front of a
+    size-bounded disk store. Disk entries are touched on every hit, so eviction
+    drops the files with the oldest mtime first. ``stats`` counts hits per
+    tier, misses (loader calls) and evictions.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_DISK_BYTES, memory_bytes=MEMORY_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.memory_bytes = memory_bytes
+        self._memory = OrderedDict()
+        self._memory_used = 0
+        self._lock = threading.Lock()
+        self._disk_bytes = None
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_evictions": 0}
+
+    def _path(self, key):
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self.directory / digest[:2] / digest
+
+    def _remember(self, key, data):
+        if len(data) > self.memory_bytes:
+            return
+        with self._lock:
+            if key in self._memory:
+                self._memory_used -= len(self._memory.pop(key))
+            self._memory[key] = data
+            self._memory_used += len(data)
+            while self._memory_used > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_used -= len(evicted)
+                self.stats["evictions"] += 1
+
+    def _disk_files(self):
+        for folder in self.directory.glob("??"):
+            for entry in os.scandir(folder):
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    yield entry
+
+    def _evict(self):
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(entry.stat().st_size for entry in self._disk_files())
+            if self._disk_bytes <= self.max_bytes:
+                return
+            entries = sorted(self._disk_files(), key=lambda entry: entry.stat().st_mtime)
+            target = self.max_bytes * 0.9
+            for entry in entries:
+                if self._disk_bytes <= target:
+                    break
+                try:
+                    size = entry.stat().st_size
+                    os.remove(entry.path)
+                    self._disk_bytes -= size
+                    self.stats["disk_evictions"] += 1
+                except OSError:
+                    pass
+
+    def _store(self, path, data):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += len(data)
+        self._evict()
+
+    def get(self, key, loader, remember=True):
+        """Bytes for ``key``; ``loader()`` is called only when neither tier has it.
+
+        ``remember=False`` keeps the entry out of the memory tier (it still goes
+        to disk), for originals that are only read to build a thumbnail.
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return self._memory[key]
+
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+            self.stats["disk_hits"] += 1
+        except OSError:
+            self.stats["misses"] += 1
+            data = loader()
+            try:
+                self._store(path, data)
+            except OSError:
+                pass
+        if remember:
+            self._remember(key, data)
+        return data
+
+    def summary(self):
+        stats = self.stats
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        hit_rate = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return (
+            f"🗃️ {self._memory_used / 1e6:.1f}/{self.memory_bytes / 1e6:.0f} MB in memory · "
+            f"{hit_rate:.0%} hits ({stats['memory_hits']} memory, {stats['disk_hits']} disk) · "
+            f"{stats['misses']} misses · {stats['evictions']} evicted"
+        )
+
+    def thumbnail(self, key, loader, size=100):
+        """PNG thumbnail of the image behind ``key``, cached alongside the original."""
+        return self.get(f"png{size}:{key}", lambda: thumbnail(self.get(key, loader, remember=False), size))
+
+
+image_cache = ImageCache()
+
+
+# -------------------- SOURCES --------------------
+def _download(url, timeout):
+    response = get_session().get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.content
+
+
+def url_image(url, timeout=10):
+    return image_cache.get(f"url:{url}", lambda: _download(url, timeout))
+
+
+def url_thumbnail(url, size=100, timeout=10):
+    return image_cache.thumbnail(f"url:{url}", lambda: _download(url, timeout), size)
+
+
+def gridfs_image(fs, file_id):
+    return image_cache.get(f"gridfs:{file_id}", lambda: fs.get(file_id).read())
+
+
+def gridfs_thumbnail(fs, file_id, size=100):
+    return image_cache.thumbnail(f"gridfs:{file_id}", lambda: fs.get(file_id).read(), size)
+
+
+def product_thumbnail(fs, product, size=120):
+    """The thumbnail stored at upload time when there is one of ``size``, else one resized from the original."""
+    file_id = (product.get("thumbnails") or {}).get(str(size))
+    if file_id:
+        return gridfs_image(fs, file_id)
+    return gridfs_thumbnail(fs, product["image_file_id"], size)
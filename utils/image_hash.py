@@ -0,0 +1,96 @@
+from collections import defaultdict
+from functools import lru_cache
+from itertools import combinations
+
+import numpy as np
+from PIL import Image
+
+from utils.thumbnails import open_reduced
+
+HASH_BITS = 64
+CHUNKS = 4
+CHUNK_BITS = HASH_BITS // CHUNKS
+# Near-duplicate product photos (re-encoded, resized, watermarked) stay well under this
+MAX_DISTANCE = 12
+
+
+def dhash(data, size=8):
+    """64-bit difference hash of an image as 16 hex digits.
+
+    Each bit says whether a pixel of the 9x8 grayscale image is brighter than
+    its right neighbour, so the hash survives rescaling and recompression.
+    """
+    img = open_reduced(data, size * 4).convert("L").resize((size + 1, size), Image.LANCZOS)
+    pixels = np.asarray(img, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return f"{int(np.packbits(bits).view('>u8')[0]):016x}"
+
+
+def _popcount(values):
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    return np.unpackbits(values.view(np.uint8)).reshape(-1, 64).sum(axis=1)
+
+
+@lru_cache(maxsize=None)
+def _masks(radius):
+    """XOR masks reaching every ``CHUNK_BITS``-bit value within Hamming distance ``radius``."""
+    masks = [0]
+    for distance in range(1, radius + 1):
+        for positions in combinations(range(CHUNK_BITS), distance):
+            masks.append(sum(1 << position for position in positions))
+    return masks
+
+
+class HashIndex:
+    """Multi-index hashing over the ``image_hash`` of a product list.
+
+    Each 64-bit hash is cut into four 16-bit chunks with one table per chunk.
+    Two hashes within distance ``r`` must agree on at least one chunk to
+    within ``r // 4`` bits, so a lookup only probes those chunk neighbours and
+    checks the few candidates with a vectorized popcount instead of scanning
+    the whole catalog.
+    """
+
+    def __init__(self, products):
+        self.products = products
+        positions = [i for i, product in enumerate(products) if product.get("image_hash")]
+        self.positions = np.array(positions, dtype=np.int64)
+        self.hashes = np.array([int(products[i]["image_hash"], 16) for i in positions], dtype=np.uint64)
+        self.tables = [defaultdict(list) for _ in range(CHUNKS)]
+        for row, value in enumerate(self.hashes.tolist()):
+            for chunk, table in enumerate(self.tables):
+                table[(value >> (chunk * CHUNK_BITS)) & 0xFFFF].append(row)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def search(self, image_hash, k=20, max_distance=MAX_DISTANCE):
+        """Up to ``k`` ``(product, distance)`` pairs within ``max_distance`` bits, nearest first."""
+        value = int(image_hash, 16)
+        radius = max_distance // CHUNKS
+        candidates = set()
+        for chunk, table in enumerate(self.tables):
+            key = (value >> (chunk * CHUNK_BITS)) & 0xFFFF
+            for mask in _masks(radius):
+                rows = table.get(key ^ mask)
+                if rows:
+                    candidates.update(rows)
+        if not candidates:
+            return []
+
+        rows = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        distances = _popcount(self.hashes[rows] ^ np.uint64(value)).astype(np.int64)
+        keep = distances <= max_distance
+        rows, distances = rows[keep], distances[keep]
+        order = np.lexsort((rows, distances))[:k]
+        return [(self.products[self.positions[rows[i]]], int(distances[i])) for i in order]
+
+
+def get_hash_index(state, products):
+    """Return the index cached in ``state`` (``st.session_state``), rebuilding it when the catalog list changes."""
+    index = state.get("hash_index")
+    if index is None or index.products is not products:
+        index = HashIndex(products)
+        state["hash_index"] = index
+    return index
@@ -0,0 +1,162 @@
+import multiprocessing
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from utils.search import ngrams, normalize
+
+SCORERS = {
+    "Token set": fuzz.token_set_ratio,
+    "Token sort": fuzz.token_sort_ratio,
+    "Weighted (WRatio)": fuzz.WRatio,
+}
+# A name is blocked on its rarest trigrams; trigrams in more than this share of
+# the other catalog ("mac", "ine", ...) say little about a match and are only
+# used when a name has nothing rarer
+MAX_DF = 0.02
+BLOCK_KEYS = 8
+MAX_CANDIDATES = 500
+CHUNK_SIZE = 500
+
+
+def name_key(name):
+    """A normalized name with its words sorted; equal keys are the same words in any order."""
+    return " ".join(sorted(name.split()))
+
+
+# -------------------- BLOCKING --------------------
+class Blocker:
+    """Trigram inverted index over one catalog's normalized names.
+
+    ``candidates(name)`` only returns names sharing some of ``name``'s rarest
+    trigrams, so each product is scored against a few hundred plausible
+    matches instead of the whole other catalog. Names with the same words
+    (``name_key``) are always candidates, even when the name is too short
+    for a trigram or made only of common vocabulary.
+    """
+
+    def __init__(self, names, max_df=MAX_DF):
+        self.names = names
+        postings = defaultdict(list)
+        same_words = defaultdict(list)
+        for position, name in enumerate(names):
+            for gram in ngrams(name):
+                postings[gram].append(position)
+            same_words[name_key(name)].append(position)
+        self.max_df = max(50, int(max_df * len(names)))
+        self.postings = {gram: np.array(rows, dtype=np.int32) for gram, rows in postings.items()}
+        self.same_words = dict(same_words)
+
+    def candidates(self, name, keys=BLOCK_KEYS, limit=MAX_CANDIDATES):
+        """Positions of names sharing the most of ``name``'s ``keys`` rarest trigrams, at most ``limit``.
+
+        Trigrams above the document-frequency cut-off only count when the
+        name has none rarer. Names with the same words come first.
+        """
+        same = self.same_words.get(name_key(name), [])
+        lists = sorted((self.postings[gram] for gram in ngrams(name) if gram in self.postings), key=len)
+        lists = ([rows for rows in lists if len(rows) <= self.max_df] or lists)[:keys]
+        if not lists:
+            return list(same)
+        positions, shared = np.unique(np.concatenate(lists), return_counts=True)
+        if len(positions) > limit:
+            positions = positions[np.argpartition(-shared, limit - 1)[:limit]]
+        known = set(same)
+        return same + [position for position in positions.tolist() if position not in known]
+
+
+# -------------------- WORKERS --------------------
+_worker = {}
+
+
+def _init_worker(right_names, scorer_name):
+    _worker["blocker"] = Blocker(right_names)
+    _worker["scorer"] = SCORERS[scorer_name]
+
+
+def _match_chunk(start, left_names, top_n, score_cutoff):
+    """``(left, right, score)`` triples for one chunk of left names, best ``top_n`` per left name."""
+    blocker, scorer = _worker["blocker"], _worker["scorer"]
+    matches = []
+    compared = 0
+    for offset, name in enumerate(left_names):
+        candidates = blocker.candidates(name)
+        if not candidates:
+            continue
+        compared += len(candidates)
+        found = process.extract(
+            name, [blocker.names[c] for c in candidates], scorer=scorer, limit=top_n, score_cutoff=score_cutoff
+        )
+        matches.extend((start + offset, candidates[index], score) for _, score, index in found)
+    return matches, compared
+
+
+# -------------------- JOB --------------------
+class MatchReport:
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+        self.compared = 0
+        self.matched = 0
+        self.seconds = 0.0
+
+    def summary(self):
+        full = self.left * self.right
+        return (
+            f"🔗 {self.matched} matches · {self.compared:,} of {full:,} pairs scored "
+            f"({self.compared / full if full else 0:.3%}) · {self.seconds:.1f}s"
+        )
+
+
+def match_catalogs(left, right, top_n=3, score_cutoff=80, scorer="Token set",
+                   workers=None, chunk_size=CHUNK_SIZE, progress=None):
+    """Rank the best ``right`` matches for every product of ``left``.
+
+    Both catalogs are lists of product dicts. Returns ``(rows, MatchReport)``
+    where each row has the two names and image URLs, the score and the rank
+    (1 = best) of the match for its left product; rows are sorted by left
+    product, then rank. Chunks of left names are scored on a process pool
+    with the right catalog's blocking index built once per worker.
+    ``progress(done, total)`` is called as chunks finish.
+    """
+    report = MatchReport(len(left), len(right))
+    started = time.monotonic()
+    left_names = [normalize(product.get("name")) for product in left]
+    right_names = [normalize(product.get("name")) for product in right]
+
+    triples = []
+    with ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(), mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker, initargs=(right_names, scorer)
+    ) as pool:
+        futures = [
+            pool.submit(_match_chunk, start, left_names[start:start + chunk_size], top_n, score_cutoff)
+            for start in range(0, len(left_names), chunk_size)
+        ]
+        for done, future in enumerate(as_completed(futures), 1):
+            matches, compared = future.result()
+            triples.extend(matches)
+            report.compared += compared
+            if progress:
+                progress(done, len(futures))
+
+    triples.sort(key=lambda triple: (triple[0], -triple[2], triple[1]))
+    rows = []
+    rank = 0
+    for position, (i, j, score) in enumerate(triples):
+        rank = rank + 1 if position and triples[position - 1][0] == i else 1
+        rows.append({
+            "product": left[i].get("name"),
+            "match": right[j].get("name"),
+            "score": round(score, 1),
+            "rank": rank,
+            "product_image_url": left[i].get("image_url"),
+            "match_image_url": right[j].get("image_url"),
+        })
+    report.matched = len(rows)
+    report.seconds = time.monotonic() - started
+    return rows, report
@@ -0,0 +1,504 @@
+import hashlib
+import queue
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import quote_plus
+
+from gridfs import GridFS
+from pymongo import ASCENDING, DESCENDING, MongoClient, UpdateOne
+
+from utils.catalog import content_hash, product_id
+from utils.image_hash import dhash
+from utils.search import normalize
+from utils.thumbnails import thumbnails
+
+CLUSTER_HOST = "cluster0.hnvlg44.mongodb.net"
+DB_NAME = "productDB"
+BATCH_SIZE = 500
+DOWNLOAD_WORKERS = 8
+DOWNLOAD_RETRIES = 2
+POOL_SIZE = 50
+LOAD_BATCH_SIZE = 10000
+# Gallery cell and preview sizes; JPEG because xlsxwriter cannot embed WebP
+THUMBNAIL_SIZES = (120, 300)
+THUMBNAIL_FORMAT = "JPEG"
+
+SORT_ORDERS = {
+    "🔤 Name (A→Z)": [("name_norm", ASCENDING)],
+    "🔤 Name (Z→A)": [("name_norm", DESCENDING)],
+    "🕒 Recently updated": [("updated_at", DESCENDING)],
+}
+
+UPLOAD_MODES = {
+    "🔁 Delta sync (soft-delete missing)": "soft",
+    "🔁 Delta sync (delete missing)": "prune",
+    "🔁 Delta sync (keep missing)": "keep",
+    "♻️ Replace everything": "replace",
+}
+
+
+def atlas_uri(username, password):
+    return f"mongodb+srv://{username}:{quote_plus(password)}@{CLUSTER_HOST}/?retryWrites=true&w=majority&appName=Cluster0"
+
+
+# -------------------- POOLED CLIENT --------------------
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(username, password, pool_size=POOL_SIZE):
+    """Process-wide ``MongoClient`` per account.
+
+    Every session and every click reuses the same connection pool, so the SRV
+    lookup and TLS handshakes happen once per process instead of per load.
+    """
+    uri = atlas_uri(username, password)
+    with _clients_lock:
+        if uri not in _clients:
+            _clients[uri] = MongoClient(
+                uri, maxPoolSize=pool_size, connectTimeoutMS=10000, serverSelectionTimeoutMS=10000
+            )
+        return _clients[uri]
+
+
+def get_database(username, password):
+    return get_client(username, password)[DB_NAME]
+
+
+def load_products(collection, fields=("name", "image_url"), query=None, batch_size=LOAD_BATCH_SIZE):
+    """Stream the live products into a list of dicts holding only ``fields``.
+
+    The projection keeps the wire payload to what the viewer shows, and a large
+    ``batch_size`` turns 100k documents into a handful of getMore round trips.
+    """
+    query = {"deleted": {"$ne": True}} if query is None else query
+    projection = dict.fromkeys(fields, 1)
+    projection["_id"] = 0
+    cursor = collection.find(query, projection, batch_size=batch_size)
+    return [{field: doc.get(field, "") for field in fields} for doc in cursor]
+
+
+# -------------------- SERVER-SIDE SEARCH --------------------
+_indexed = set()
+
+
+def ensure_search_indexes(collection, batch_size=BATCH_SIZE):
+    """Create the search indexes once per process and backfill ``name_norm`` on older documents.
+
+    ``name_norm`` is the casefolded name, so substring search is a
+    case-sensitive regex that MongoDB can answer from the index keys alone.
+    The text index uses ``default_language="none"`` because names mix Thai and
+    English and must not be stemmed.
+    """
+    key = (collection.database.name, collection.name)
+    if key in _indexed:
+        return
+    collection.create_index([("name_norm", ASCENDING)])
+    collection.create_index([("updated_at", DESCENDING)])
+    collection.create_index([("name", "text")], name="name_text", default_language="none")
+
+    ops = [
+        UpdateOne({"_id": doc["_id"]}, {"$set": {"name_norm": normalize(doc.get("name"))}})
+        for doc in collection.find({"name_norm": {"$exists": False}}, {"name": 1}, batch_size=LOAD_BATCH_SIZE)
+    ]
+    for batch in _batches(ops, batch_size):
+        collection.bulk_write(batch, ordered=False)
+    _indexed.add(key)
+
+
+def search_filter(query="", text=False):
+    """Live products matching ``query``: a ``$text`` word search, or a substring of the normalized name."""
+    criteria = {"deleted": {"$ne": True}}
+    if query and text:
+        criteria["$text"] = {"$search": query}
+    elif query:
+        criteria["name_norm"] = {"$regex": re.escape(normalize(query))}
+    return criteria
+
+
+def count_products(collection, query="", text=False):
+    return collection.count_documents(search_filter(query, text))
+
+
+def query_products(collection, query="", skip=0, limit=20, sort="🔤 Name (A→Z)", text=False,
+                   fields=("name", "image_url")):
+    """One page of matching products, sorted and windowed by MongoDB.
+
+    A ``$text`` search is ordered by relevance and ignores ``sort``.
+    """
+    projection = dict.fromkeys(fields, 1)
+    projection["_id"] = 0
+    if query and text:
+        projection["score"] = {"$meta": "textScore"}
+        order = [("score", {"$meta": "textScore"})]
+    else:
+        order = SORT_ORDERS[sort]
+    cursor = collection.find(search_filter(query, text), projection).sort(order).skip(skip).limit(limit)
+    return [{field: doc.get(field, "") for field in fields} for doc in cursor]
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class StageStats:
+    """Items, bytes and busy seconds of one upload stage."""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def add(self, items, nbytes, seconds):
+        self.items += items
+        self.bytes += nbytes
+        self.seconds += seconds
+
+    def summary(self):
+        seconds = max(self.seconds, 1e-6)
+        return f"{self.name} {self.items / seconds:.1f} items/s, {self.bytes / seconds / 1e6:.2f} MB/s"
+
+
+class SyncReport:
+    def __init__(self):
+        self.download = StageStats("⬇️ download")
+        self.write = StageStats("⬆️ write")
+        self.failed = []
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.removed = 0
+        self.adopted = 0
+        self.image_failed = 0
+        self.images_stored = 0
+        self.duplicate_images = 0
+        self.round_trips = 0
+
+    def summary(self):
+        return (
+            f"➕ {self.inserted} new · ✏️ {self.updated} changed · ✅ {self.unchanged} unchanged · "
+            f"🗑️ {self.removed} removed · 📦 {self.adopted} legacy adopted · ⚠️ {self.image_failed} image failures · "
+            f"🖼️ {self.images_stored} images stored, {self.duplicate_images} duplicates reused · "
+            f"{self.round_trips} Atlas round trips · {self.download.summary()} · {self.write.summary()}"
+        )
+
+
+# -------------------- CONTENT-ADDRESSED IMAGES --------------------
+class ImageStore:
+    """GridFS writes keyed by the SHA-256 of the image bytes.
+
+    Identical images (the same photo listed under several categories, or under
+    "All") are stored once, and every product points at the same file id.
+    """
+
+    def __init__(self, db):
+        self.fs = GridFS(db)
+        self.files = db.fs.files
+        self.files.create_index("metadata.sha256")
+        self._known = {}
+
+    def put_many(self, images, report):
+        """Store ``(filename, bytes)`` pairs; returns their file ids in order."""
+        digests = [hashlib.sha256(data).hexdigest() for _, data in images]
+        unknown = list({digest for digest in digests if digest not in self._known})
+        if unknown:
+            for doc in self.files.find({"metadata.sha256": {"$in": unknown}}, {"metadata.sha256": 1}):
+                self._known[doc["metadata"]["sha256"]] = doc["_id"]
+            report.round_trips += 1
+
+        file_ids = []
+        for (filename, data), digest in zip(images, digests):
+            if digest in self._known:
+                report.duplicate_images += 1
+            else:
+                self._known[digest] = self.fs.put(data, filename=filename, metadata={"sha256": digest})
+                report.images_stored += 1
+                report.round_trips += 1
+            file_ids.append(self._known[digest])
+        return file_ids
+
+
+# -------------------- UPLOAD PIPELINE --------------------
+_DONE = object()
+
+
+def run_pipeline(items, load, write, report, batch_size=BATCH_SIZE, workers=DOWNLOAD_WORKERS,
+                 retries=DOWNLOAD_RETRIES, flush_interval=0.5, nbytes=len):
+    """Overlap image downloads with Atlas writes.
+
+    ``workers`` threads call ``load(item)`` (retrying ``retries`` times with
+    backoff) and push ``(item, data, error)`` into a bounded queue, so a slow
+    writer throttles the downloaders instead of piling images up in memory.
+    The calling thread drains the queue and hands ``write(batch)`` up to
+    ``batch_size`` results at a time, or whatever has arrived once the queue
+    has been idle for ``flush_interval`` seconds. ``nbytes(data)`` sizes a
+    result for the throughput figures.
+    """
+    results = queue.Queue(maxsize=batch_size * 2)
+    pending = iter(items)
+    lock = threading.Lock()
+
+    def download(item):
+        for attempt in range(retries + 1):
+            try:
+                return load(item), None
+            except Exception as e:
+                error = e
+                if attempt < retries:
+                    time.sleep(0.5 * 2 ** attempt)
+        return None, error
+
+    def downloader():
+        try:
+            while True:
+                with lock:
+                    item = next(pending, _DONE)
+                if item is _DONE:
+                    return
+                started = time.monotonic()
+                data, error = download(item)
+                report.download.add(1, nbytes(data) if data is not None else 0, time.monotonic() - started)
+                results.put((item, data, error))
+        finally:
+            results.put(_DONE)
+
+    workers = max(1, min(workers, len(items)))
+    for _ in range(workers):
+        threading.Thread(target=downloader, daemon=True, name="upload-download").start()
+
+    started = time.monotonic()
+    finished = 0
+    batch = []
+    while finished < workers:
+        try:
+            entry = results.get(timeout=flush_interval)
+        except queue.Empty:
+            entry = None
+        if entry is _DONE:
+            finished += 1
+        elif entry is not None:
+            batch.append(entry)
+        if batch and (entry is None or len(batch) >= batch_size):
+            write(batch)
+            batch = []
+    if batch:
+        write(batch)
+
+    # Downloader busy time adds up across threads; report wall-clock throughput instead
+    report.download.seconds = time.monotonic() - started
+
+
+# -------------------- SYNC --------------------
+def _load_images(load_image, url):
+    """``(files, image_hash)``: the original and its ``THUMBNAIL_SIZES`` thumbnails
+    keyed ``"original"``, ``"120"``, ..., plus its ``dhash`` for photo search.
+
+    Runs on the download threads; both sizes come from one reduced decode on
+    the thumbnail process pool. An image Pillow cannot decode is still
+    stored, just without thumbnails or hash.
+    """
+    data = load_image(url)
+    images = {"original": data}
+    try:
+        images.update(thumbnails(data, THUMBNAIL_SIZES, THUMBNAIL_FORMAT))
+        image_hash = dhash(data)
+    except Exception:
+        image_hash = None
+    return images, image_hash
+
+
+def _upsert(_id, product, image_file_id, source, category, digest, now, image_error=None, thumbnails=None,
+            image_hash=None):
+    return UpdateOne(
+        {"_id": _id},
+        {
+            "$set": {
+                "name": product["name"],
+                "name_norm": normalize(product["name"]),
+                "image_url": product.get("image_url"),
+                "image_file_id": image_file_id,
+                "thumbnails": thumbnails or {},
+                "image_hash": image_hash,
+                "source": source,
+                "category": category,
+                "content_hash": digest,
+                "image_error": image_error,
+                "deleted": False,
+                "updated_at": now,
+            },
+            "$setOnInsert": {"created_at": now},
+        },
+        upsert=True
+    )
+
+
+def sync_products(db, products, source, category=None, prune="soft", load_image=None,
+                  batch_size=BATCH_SIZE, workers=DOWNLOAD_WORKERS, progress=None):
+    """Upsert ``products`` for one ``source``/``category`` scope with batched ``bulk_write``.
+
+    Documents whose name and image URL are unchanged are not written at all,
+    and an image is only downloaded when its URL is new or changed (or it has
+    no thumbnails yet). It is stored with ``THUMBNAIL_SIZES`` JPEG thumbnails,
+    referenced from ``thumbnails`` by size, and GridFS only writes files whose
+    content hash is not there already.
+    Products of this scope missing from ``products`` are flagged ``deleted``
+    (``prune="soft"``), removed with their orphaned images (``"prune"``) or
+    left alone (``"keep"``).
+
+    Documents of the original upload have no ``source``/``category``, so no
+    scope covers them. Those whose name and image URL match one of
+    ``products`` are adopted: the scoped document is built from their GridFS
+    image instead of a new download, and they are removed once it is written.
+
+    New images go through ``run_pipeline``. A product whose image still fails
+    after the retries is stored without one (``image_error`` says why, and the
+    next sync tries again) and listed in ``report.failed``.
+    ``progress(done, total)`` is called after every written batch.
+    """
+    collection = db["products"]
+    fs = GridFS(db)
+    report = SyncReport()
+    now = datetime.now(timezone.utc)
+    scope = {"source": source, "category": category}
+
+    collection.create_index([("source", 1), ("category", 1)])
+    existing = {
+        doc["_id"]: doc
+        for doc in collection.find(scope, {"content_hash": 1, "image_url": 1, "image_file_id": 1, "thumbnails": 1, "image_hash": 1, "deleted": 1})
+        .batch_size(5000)
+    }
+    legacy = {}
+    for doc in collection.find({"source": {"$exists": False}}, {"name": 1, "image_url": 1, "image_file_id": 1}).batch_size(5000):
+        legacy.setdefault((doc.get("name"), doc.get("image_url")), []).append(doc)
+    report.round_trips += 3 + len(existing) // 5000
+
+    incoming = {}
+    for product in products:
+        incoming.setdefault(product_id(product, source, category), product)
+
+    adopted = []
+    legacy_images = {}
+    for _id, product in incoming.items():
+        docs = legacy.pop((product.get("name"), product.get("image_url")), [])
+        adopted += docs
+        file_ids = [doc["image_file_id"] for doc in docs if doc.get("image_file_id")]
+        if file_ids:
+            legacy_images[_id] = file_ids[0]
+
+    ops = []
+    needs_image = []
+    for _id, product in incoming.items():
+        old = existing.get(_id)
+        digest = content_hash(product)
+        has_images = old and old.get("image_file_id") and old.get("thumbnails") is not None and "image_hash" in old
+        no_image = not product.get("image_url")
+        if old and (has_images or no_image) and old.get("content_hash") == digest and not old.get("deleted"):
+            report.unchanged += 1
+            continue
+
+        if no_image:  # nothing to download; written like any other change
+            ops.append(_upsert(_id, product, None, source, category, digest, now))
+            if old:
+                report.updated += 1
+            else:
+                report.inserted += 1
+        elif has_images and old.get("image_url") == product.get("image_url"):
+            ops.append(_upsert(
+                _id, product, old["image_file_id"], source, category, digest, now,
+                thumbnails=old["thumbnails"], image_hash=old["image_hash"]
+            ))
+            report.updated += 1
+        else:
+            needs_image.append((_id, product, digest, old))
+
+    for batch in _batches(ops, batch_size):
+        collection.bulk_write(batch, ordered=False)
+        report.round_trips += 1
+    if progress and incoming:
+        progress(report.unchanged + report.updated + report.inserted, len(incoming))
+
+    images = ImageStore(db)
+
+    def write(batch):
+        started = time.monotonic()
+        files = [
+            ((item[0], kind), (f"{item[1]['name']}.png" if kind == "original" else f"{item[1]['name']}_{kind}.jpg", data))
+            for item, loaded, _ in batch if loaded is not None
+            for kind, data in loaded[0].items()
+        ]
+        file_ids = dict(zip((key for key, _ in files), images.put_many([file for _, file in files], report)))
+
+        writes = []
+        for (_id, product, digest, old), loaded, error in batch:
+            if loaded is None:
+                report.image_failed += 1
+                report.failed.append({"name": product["name"], "image_url": product["image_url"], "error": str(error)})
+            writes.append(_upsert(
+                _id, product, file_ids.get((_id, "original")), source, category, digest, now,
+                image_error=None if loaded is not None else str(error),
+                thumbnails={kind: file_ids[(_id, kind)] for kind in loaded[0] if kind != "original"} if loaded else None,
+                image_hash=loaded[1] if loaded else None
+            ))
+            if old:
+                report.updated += 1
+            else:
+                report.inserted += 1
+
+        collection.bulk_write(writes, ordered=False)
+        report.round_trips += 1
+        report.write.add(len(batch), sum(len(data) for _, (_, data) in files), time.monotonic() - started)
+        if progress:
+            progress(report.unchanged + report.updated + report.inserted, len(incoming))
+
+    def load(item):
+        file_id = legacy_images.get(item[0])
+        if file_id is not None:  # ภาพเดิมอยู่ใน GridFS แล้ว ไม่ต้องโหลดใหม่
+            return _load_images(lambda _: fs.get(file_id).read(), item[1]["image_url"])
+        return _load_images(load_image, item[1]["image_url"])
+
+    if needs_image:
+        run_pipeline(
+            needs_image, load, write, report,
+            batch_size, workers, nbytes=lambda loaded: sum(map(len, loaded[0].values()))
+        )
+
+    if adopted:
+        collection.delete_many({"_id": {"$in": [doc["_id"] for doc in adopted]}})
+        for doc in adopted:
+            if doc.get("image_file_id"):
+                fs.delete(doc["image_file_id"])
+        report.adopted = len(adopted)
+        report.round_trips += 1 + sum(1 for doc in adopted if doc.get("image_file_id"))
+
+    missing = [_id for _id, doc in existing.items() if _id not in incoming and not doc.get("deleted")]
+    if missing and prune == "soft":
+        collection.update_many({"_id": {"$in": missing}}, {"$set": {"deleted": True, "deleted_at": now}})
+        report.removed = len(missing)
+        report.round_trips += 1
+    elif missing and prune == "prune":
+        file_ids = [existing[_id]["image_file_id"] for _id in missing if existing[_id].get("image_file_id")]
+        file_ids += [file_id for _id in missing for file_id in (existing[_id].get("thumbnails") or {}).values()]
+        collection.delete_many({"_id": {"$in": missing}})
+        still_used = set()
+        for field in ("image_file_id",) + tuple(f"thumbnails.{size}" for size in THUMBNAIL_SIZES):
+            still_used.update(collection.distinct(field, {field: {"$in": file_ids}}))
+        for file_id in set(file_ids) - still_used:
+            fs.delete(file_id)
+        report.removed = len(missing)
+        report.round_trips += 1 + 1 + len(THUMBNAIL_SIZES) + len(set(file_ids) - still_used)
+
+    return report
+
+
+def upload_products(db, products, source, category=None, mode="soft", load_image=None, progress=None):
+    """Run one of ``UPLOAD_MODES``; ``"replace"`` wipes products and GridFS first, like the old upload."""
+    if mode == "replace":
+        db["products"].delete_many({})
+        db.fs.files.delete_many({})
+        db.fs.chunks.delete_many({})
+        mode = "keep"
+    return sync_products(db, products, source, category, prune=mode, load_image=load_image, progress=progress)
@@ -0,0 +1,87 @@
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+FUZZY_CUTOFF = 70
+GRAM = 3
+# Intersecting the rarest few posting lists already leaves a tiny candidate set
+MAX_INTERSECT = 4
+
+
+def normalize(text):
+    return unicodedata.normalize("NFC", text or "").casefold()
+
+
+def ngrams(text, n=GRAM):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class SearchIndex:
+    """Pre-normalized product names for one catalog list.
+
+    The index keeps a reference to the list it was built from and picks up
+    products appended to it later (e.g. by a streaming scrape) on the next query.
+    Substring search goes through a character trigram inverted index, which
+    works the same for Thai and English names since it never tokenizes words.
+    """
+
+    def __init__(self, products):
+        self.products = products
+        self.names = []
+        self.postings = defaultdict(list)
+        self.sync()
+
+    def sync(self):
+        if len(self.products) < len(self.names):
+            self.names = []
+            self.postings = defaultdict(list)
+        for product in self.products[len(self.names):]:
+            name = normalize(product.get("name"))
+            position = len(self.names)
+            self.names.append(name)
+            for gram in ngrams(name):
+                self.postings[gram].append(position)
+
+    def fuzzy(self, query, limit=100, score_cutoff=FUZZY_CUTOFF):
+        """Top ``limit`` products by ``partial_ratio``, best first, scoring above ``score_cutoff``."""
+        self.sync()
+        query = normalize(query)
+        if not query or not self.names:
+            return []
+
+        scores = process.cdist(
+            [query], self.names,
+            scorer=fuzz.partial_ratio, score_cutoff=score_cutoff,
+            dtype=np.float32, workers=-1
+        )[0]
+        matches = np.flatnonzero(scores > score_cutoff)
+        if len(matches) > limit:
+            matches = matches[np.argpartition(-scores[matches], limit - 1)[:limit]]
+        matches = matches[np.argsort(-scores[matches], kind="stable")]
+        return [self.products[i] for i in matches]
+
+    def substring(self, query):
+        self.sync()
+        query = normalize(query)
+        if len(query) < GRAM:
+            return [self.products[i] for i, name in enumerate(self.names) if query in name]
+
+        lists = sorted((self.postings.get(gram, ()) for gram in ngrams(query)), key=len)
+        candidates = set(lists[0])
+        for posting in lists[1:MAX_INTERSECT]:
+            if not candidates:
+                break
+            candidates.intersection_update(posting)
+        # Posting lists only prove every trigram occurs somewhere, so confirm the real substring
+        return [self.products[i] for i in sorted(candidates) if query in self.names[i]]
+
+
+def get_search_index(state, products):
+    """Return the index cached in ``state`` (``st.session_state``), rebuilding it when the catalog list changes."""
+    index = state.get("search_index")
+    if index is None or index.products is not products:
+        index = SearchIndex(products)
+        state["search_index"] = index
+    return index
@@ -0,0 +1,52 @@
+HEADERS = {'User-Agent': 'Mozilla/5.0'}
+# Page lists without a last page run up to here; scrape_pages(until_last=True) stops at the real end
+MAX_PAGES = 500
+
+# -------------------- HSC SPARE PARTS --------------------
+HSC_SOURCE = "hsc-spareparts.com"
+HSC_BASE_URL = "https://hsc-spareparts.com/products/"
+
+# -------------------- ALIBABA STORE CATEGORIES --------------------
+ALIBABA_SOURCE = "fslidingfeng.en.alibaba.com"
+
+# หมวดหมู่ → (URL ส่วนหน้า, ส่วนท้ายหลังเลขหน้า)
+CATEGORIES = {
+    "All": ("https://fslidingfeng.en.alibaba.com/productlist-", ".html"),
+    "Blow Molding Machines": ("https://fslidingfeng.en.alibaba.com/productgrouplist-822252468-", "/Blow_Molding_Machines.html"),
+    "Filler Capper Machines": ("https://fslidingfeng.en.alibaba.com/productgrouplist-821937823-", "/Filler_Capper_Machines.html"),
+    "Labeler Rinsing Machines": ("https://fslidingfeng.en.alibaba.com/productgrouplist-822009771-", "/Labeler_Rinsing_Machines.html"),
+    "Bottle Washer Machines": ("https://fslidingfeng.en.alibaba.com/productgrouplist-822274262-", "/Bottle_Washer_Machines.html"),
+    "Wrapping Machines": ("https://fslidingfeng.en.alibaba.com/productgrouplist-822158603-", "/Wrapping_Machines.html"),
+    "Packer Unpacker": ("https://fslidingfeng.en.alibaba.com/productgrouplist-822019527-", "/Packer_Unpacker.html"),
+    "PET Water Bottle Spare Parts": ("https://fslidingfeng.en.alibaba.com/productgrouplist-822081922-", "/PET_Water_Bottle_Spare_Parts.html"),
+    "HSC Spare Parts": ("https://fslidingfeng.en.alibaba.com/productgrouplist-822746774-", "/HSC_spare_parts.html"),
+}
+
+
+def hsc_page_urls(first=1, last=None):
+    """Listing-page URLs ``first..last``; without ``last`` up to ``MAX_PAGES``."""
+    return [f"{HSC_BASE_URL}{page}.html" for page in range(first, (last or MAX_PAGES) + 1)]
+
+
+def category_page_urls(category, first=1, last=None):
+    """Listing-page URLs ``first..last`` of one Alibaba store category; without ``last`` up to ``MAX_PAGES``."""
+    base_url, endpath = CATEGORIES[category]
+    return [f"{base_url}{page}{endpath}" for page in range(first, (last or MAX_PAGES) + 1)]
+
+
+def store_list_page_urls(first, last):
+    """Listing-page URLs ``first..last`` of the whole Alibaba store in list view, newest first."""
+    base_url, endpath = CATEGORIES["All"]
+    return [
+        f"{base_url}{page}{endpath}?filter=null&sortType=modified-desc&isGallery=N" for page in range(first, last + 1)
+    ]
+
+
+def scrape_targets(first=1, last=None):
+    """``(source, category, layout name, page URLs)`` for every source and category."""
+    targets = [(HSC_SOURCE, None, "hsc", hsc_page_urls(first, last))]
+    targets += [
+        (ALIBABA_SOURCE, category, "alibaba_category", category_page_urls(category, first, last))
+        for category in CATEGORIES
+    ]
+    return targets
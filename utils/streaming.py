@@ -0,0 +1,165 @@
+import hashlib
+import threading
+import time
+
+import requests
+import streamlit as st
+
+from utils.catalog import page_fingerprint
+from utils.extractors import ParseStats, parse_page
+from utils.fetcher import fetch_pages
+
+
+# -------------------- PAGE PIPELINE --------------------
+def scrape_pages(page_urls, layout, headers=None, max_workers=4, limiter=None, until_last=False, page_log=None):
+    """Yield ``(url, products, parse_seconds)`` for each listing page, in page order.
+
+    With ``until_last`` the URLs may run past the last page (see
+    ``utils.sources``): scraping stops at the first page with no products,
+    with the same products as the page before it (sites that clamp
+    out-of-range page numbers), or that is a 404.
+
+    With a ``page_log`` (``Catalog.page_log``) a page whose body is
+    byte-identical to the last run, e.g. a 304 from the HTTP cache, is not
+    parsed and yields no products (``parse_seconds`` is None); other pages
+    yield only products the log has not seen. A page is recorded once the
+    consumer asks for the next one, i.e. after a ``ScrapeJob`` sink stored
+    it; a ``deferred`` log keeps the records until the caller's ``flush``.
+    """
+    pages = fetch_pages(page_urls, headers=headers, max_workers=max_workers, limiter=limiter)
+    previous = None
+    try:
+        for url, response in pages:
+            body_hash = hashlib.sha1(response.content).hexdigest() if page_log else None
+            stored = page_log.unchanged(url, body_hash) if page_log else None
+            if stored is not None:
+                (fingerprint, count), products, parse_seconds = stored, [], None
+            else:
+                products, parse_seconds = parse_page(response.content, layout, url)
+                fingerprint, count = page_fingerprint(products), len(products)
+
+            if until_last and (not count or fingerprint == previous):
+                return
+            previous = fingerprint
+
+            yield url, page_log.new_products(products) if page_log else products, parse_seconds
+            if page_log and stored is None:
+                page_log.record(url, body_hash, fingerprint, products)
+    except requests.HTTPError as e:
+        if not (until_last and previous is not None and e.response is not None and e.response.status_code == 404):
+            raise
+    finally:
+        pages.close()
+
+
+class ScrapeJob:
+    """Drains a ``scrape_pages`` generator into ``products`` one page at a time.
+
+    ``run`` works on the script thread; ``start`` runs the same loop on a
+    background thread so the page can rerun (search, gallery) on the partial
+    catalog while scraping continues. The job never calls Streamlit itself.
+    ``sink(products)``, if given, also receives every page's products (e.g.
+    ``catalog_sink`` to persist them locally).
+    """
+
+    def __init__(self, pages, total_pages, products=None, sink=None):
+        self.pages = pages
+        self.sink = sink
+        self.total_pages = total_pages
+        self.products = products if products is not None else []
+        self.pages_done = 0
+        self.parse_stats = ParseStats()
+        self.error = None
+        self.reported = False
+        self.started_at = None
+        self.finished_at = None
+        self._cancelled = threading.Event()
+        self._thread = None
+
+    def run(self, on_page=None):
+        self.started_at = time.monotonic()
+        try:
+            for _, products, parse_seconds in self.pages:
+                if self._cancelled.is_set():
+                    break
+                self.products.extend(products)
+                if self.sink:
+                    self.sink(products)
+                self.parse_stats.add(parse_seconds)
+                self.pages_done += 1
+                if on_page:
+                    on_page(self)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.pages.close()
+            self.finished_at = time.monotonic()
+        return self
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def fraction(self):
+        if self.total_pages is None:  # scraping until the last page: creep towards 1 until it is found
+            return 1.0 if self.finished_at else self.pages_done / (self.pages_done + 1)
+        return min(1.0, self.pages_done / self.total_pages) if self.total_pages else 1.0
+
+    def status_text(self):
+        end = self.finished_at or time.monotonic()
+        elapsed = max(end - (self.started_at or end), 1e-6)
+        total = "" if self.total_pages is None else f"/{self.total_pages}"
+        return (
+            f"📄 {self.pages_done}{total} pages · {len(self.products)} products · "
+            f"{self.pages_done / elapsed:.2f} pages/s · {len(self.products) / elapsed:.1f} items/s"
+        )
+
+
+# -------------------- STREAMLIT HELPERS --------------------
+def start_stream(pages, total_pages, sink=None):
+    """Start a background job that fills ``st.session_state.all_products`` as pages arrive."""
+    previous = st.session_state.get("scrape_job")
+    if previous is not None:
+        previous.cancel()
+    st.session_state.all_products = []
+    st.session_state.scrape_job = ScrapeJob(pages, total_pages, st.session_state.all_products, sink).start()
+
+
+def render_stream_status():
+    job = st.session_state.get("scrape_job")
+    if job is None:
+        return
+    if job.running:
+        st.sidebar.progress(job.fraction, text=job.status_text())
+    elif not job.reported:
+        job.reported = True
+        if job.error is not None:
+            st.error(f"An error occurred: {job.error}")
+        else:
+            st.success(f"✅ Successfully scraped {len(job.products)} products")
+        st.caption(job.status_text())
+        st.caption(job.parse_stats.summary())
+
+
+def hold_refresh():
+    """Skip the next auto-rerun so a freshly rendered download button isn't wiped."""
+    st.session_state.hold_stream_refresh = True
+
+
+def keep_streaming(interval=1.0):
+    """Rerun the page while a background scrape is still running; call at the end of the script."""
+    if st.session_state.pop("hold_stream_refresh", False):
+        return
+    job = st.session_state.get("scrape_job")
+    if job is not None and (job.running or not job.reported):
+        time.sleep(interval)
+        st.rerun()
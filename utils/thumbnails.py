@@ -0,0 +1,167 @@
+import argparse
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+from PIL import Image
+
+# Below this many bytes the round trip to a worker process costs more than the decode
+INLINE_BYTES = 64 * 1024
+# thumbnail() first shrinks by an integer factor with reduce() until the image
+# is within this factor of the target, then resamples the rest
+REDUCING_GAP = 2.0
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def open_reduced(data, size):
+    """Open ``data`` decoding as little as possible for a ``size`` x ``size`` thumbnail.
+
+    For JPEGs ``draft`` makes libjpeg decode straight at 1/2, 1/4 or 1/8
+    scale, which skips most of the IDCT work on large product photos.
+    """
+    img = Image.open(BytesIO(data))
+    if img.format == "JPEG":
+        img.draft("RGB", (size, size))
+    return img
+
+
+def _encode(img, format, quality):
+    if format == "JPEG" and img.mode not in ("RGB", "L"):
+        # JPEG has no alpha: lay transparent product shots on white instead of letting convert() blacken them
+        rgba = img.convert("RGBA")
+        img = Image.new("RGB", rgba.size, (255, 255, 255))
+        img.paste(rgba, mask=rgba.getchannel("A"))
+    output = BytesIO()
+    img.save(output, format=format, quality=quality)
+    return output.getvalue()
+
+
+def make_thumbnail(data, size=100, format="PNG", quality=85):
+    """Encode ``data`` shrunk to fit ``size`` x ``size``; JPEG puts transparent areas on white."""
+    img = open_reduced(data, size)
+    img.thumbnail((size, size), reducing_gap=REDUCING_GAP)
+    return _encode(img, format, quality)
+
+
+def make_thumbnails(data, sizes, format="JPEG", quality=85):
+    """Several sizes from one decode: ``{str(size): bytes}``, each resized from the next larger one."""
+    img = open_reduced(data, max(sizes))
+    thumbnails = {}
+    for size in sorted(sizes, reverse=True):
+        img.thumbnail((size, size), reducing_gap=REDUCING_GAP)
+        thumbnails[str(size)] = _encode(img, format, quality)
+    return thumbnails
+
+
+# -------------------- PROCESS POOL --------------------
+def get_pool(max_workers=None):
+    """Process-wide pool for decoding, so thumbnails scale across cores instead of sharing the GIL.
+
+    Workers are spawned, not forked: the Streamlit server is multi-threaded.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=max_workers or os.cpu_count(), mp_context=multiprocessing.get_context("spawn")
+            )
+    return _pool
+
+
+def submit(fn, *args):
+    """``get_pool().submit``; a pool broken by a crashed worker (OOM, decompression bomb) is replaced once.
+
+    The task that killed the worker still fails with ``BrokenProcessPool``,
+    but later calls get a fresh pool instead of failing for the life of the server.
+    """
+    global _pool
+    pool = get_pool()
+    try:
+        return pool.submit(fn, *args)
+    except BrokenProcessPool:
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        pool.shutdown(wait=False)
+        return get_pool().submit(fn, *args)
+
+
+def thumbnail(data, size=100, format="PNG", quality=85):
+    """``make_thumbnail`` on the process pool; safe to call from many threads at once."""
+    if len(data) < INLINE_BYTES:
+        return make_thumbnail(data, size, format, quality)
+    return submit(make_thumbnail, data, size, format, quality).result()
+
+
+def thumbnails(data, sizes, format="JPEG", quality=85):
+    """``make_thumbnails`` on the process pool."""
+    if len(data) < INLINE_BYTES:
+        return make_thumbnails(data, sizes, format, quality)
+    return submit(make_thumbnails, data, sizes, format, quality).result()
+
+
+# -------------------- BENCHMARK --------------------
+def _baseline_thumbnail(data, size=100, reducing_gap=2.0):
+    """The old path: ``Image.open`` then ``thumbnail`` (``reducing_gap=None`` forces a full-size decode)."""
+    img = Image.open(BytesIO(data))
+    img.thumbnail((size, size), reducing_gap=reducing_gap)
+    output = BytesIO()
+    img.save(output, format="PNG")
+    return output.getvalue()
+
+
+def _sample_images(count, width, height):
+    """Photo-like JPEGs (smooth gradients plus blurred texture) the size of scraped product photos."""
+    images = []
+    gradient = Image.linear_gradient("L").resize((width, height)).convert("RGB")
+    for i in range(count):
+        texture = Image.effect_noise((width // 8, height // 8), 40 + i % 30).resize((width, height), Image.BICUBIC)
+        img = Image.blend(gradient, texture.convert("RGB"), 0.5)
+        output = BytesIO()
+        img.save(output, format="JPEG", quality=90)
+        images.append(output.getvalue())
+    return images
+
+
+def _rate(name, images, run):
+    started = time.perf_counter()
+    run(images)
+    seconds = time.perf_counter() - started
+    print(f"  {name:<28} {len(images) / seconds:8.1f} images/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare thumbnail throughput of the old and new decoding paths.")
+    parser.add_argument("--images", type=int, default=64)
+    parser.add_argument("--width", type=int, default=2400)
+    parser.add_argument("--height", type=int, default=1800)
+    parser.add_argument("--size", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    images = _sample_images(args.images, args.width, args.height)
+    print(f"{args.images} JPEGs {args.width}x{args.height} -> {args.size}px PNG on {os.cpu_count()} cores")
+    _rate("full-size decode", images, lambda batch: [_baseline_thumbnail(d, args.size, None) for d in batch])
+    _rate("before (thumbnail())", images, lambda batch: [_baseline_thumbnail(d, args.size) for d in batch])
+    _rate("draft/reduce, 1 process", images, lambda batch: [make_thumbnail(d, args.size) for d in batch])
+
+    pool = get_pool()
+    list(pool.map(make_thumbnail, images[:os.cpu_count()]))  # start the workers outside the timing
+    _rate("draft/reduce, process pool", images, lambda batch: list(pool.map(make_thumbnail, batch, [args.size] * len(batch))))
+
+    print("upload: 120px + 300px JPEG")
+    _rate("before (two decodes)", images, lambda batch: [
+        [make_thumbnail(d, size, "JPEG") for size in (300, 120)] for d in batch
+    ])
+    _rate("one decode, process pool", images, lambda batch: list(pool.map(
+        make_thumbnails, batch, [(120, 300)] * len(batch)
+    )))
+
+
+if __name__ == "__main__":
+    main()
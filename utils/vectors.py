@@ -0,0 +1,136 @@
+import os
+import threading
+
+import numpy as np
+
+from utils.image_hash import dhash
+from utils.thumbnails import INLINE_BYTES, open_reduced, submit
+
+FEATURE_SIZE = 64
+COLOR_BINS = 4
+EDGE_CELLS = 2
+EDGE_BINS = 8
+DIM = COLOR_BINS ** 3 + EDGE_CELLS * EDGE_CELLS * EDGE_BINS
+# Colour dominates how "similar" product photos look; edges separate shapes of the same colour
+COLOR_WEIGHT = 0.6
+SEARCH_CHUNK = 65536
+
+
+# -------------------- FEATURES --------------------
+def image_features(data, size=FEATURE_SIZE):
+    """``DIM`` float32 descriptor of an image, L2-normalized so a dot product is the cosine.
+
+    A joint 4x4x4 RGB histogram plus magnitude-weighted gradient orientation
+    histograms over a 2x2 grid, each square-rooted (Hellinger) so a few large
+    bins do not swamp the rest.
+    """
+    img = open_reduced(data, size).convert("RGB").resize((size, size))
+    pixels = np.asarray(img, dtype=np.float32) / 255.0
+
+    quantized = np.minimum((pixels * COLOR_BINS).astype(np.int32), COLOR_BINS - 1)
+    codes = (quantized[..., 0] * COLOR_BINS + quantized[..., 1]) * COLOR_BINS + quantized[..., 2]
+    color = np.bincount(codes.ravel(), minlength=COLOR_BINS ** 3).astype(np.float32)
+
+    gray = pixels @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    gy, gx = np.gradient(gray)
+    magnitude = np.hypot(gx, gy)
+    orientation = np.minimum((np.arctan2(gy, gx) % np.pi / np.pi * EDGE_BINS).astype(np.int32), EDGE_BINS - 1)
+    cell_rows = np.arange(size) * EDGE_CELLS // size
+    cells = cell_rows[:, None] * EDGE_CELLS + cell_rows[None, :]
+    edges = np.bincount(
+        (cells * EDGE_BINS + orientation).ravel(), weights=magnitude.ravel(),
+        minlength=EDGE_CELLS * EDGE_CELLS * EDGE_BINS
+    ).astype(np.float32)
+
+    parts = []
+    for histogram, weight in ((color, COLOR_WEIGHT), (edges, 1.0 - COLOR_WEIGHT)):
+        total = histogram.sum()
+        parts.append(np.sqrt(histogram / total) * np.sqrt(weight) if total else histogram)
+    vector = np.concatenate(parts)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def describe(data):
+    """``(dhash, features)`` of one image, from a single download."""
+    return dhash(data), image_features(data)
+
+
+def describe_many(images):
+    """``describe`` for a batch; large images are spread over the thumbnail process pool.
+
+    Entries that fail to decode come back as ``None``.
+    """
+    def safe(future_or_data):
+        try:
+            return future_or_data.result() if hasattr(future_or_data, "result") else describe(future_or_data)
+        except Exception:
+            return None
+
+    pending = [submit(describe, data) if len(data) >= INLINE_BYTES else data for data in images]
+    return [safe(item) for item in pending]
+
+
+# -------------------- MEMORY-MAPPED MATRIX --------------------
+class VectorMatrix:
+    """Float32 rows of ``dim`` columns in a flat file, read through ``np.memmap``.
+
+    The matrix lives in the OS page cache, so every session and thread shares
+    one copy instead of holding the vectors on its own heap. Rows are written
+    in place; the file grows in doubling steps.
+    """
+
+    def __init__(self, path, dim=DIM):
+        self.path = path
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._map = None
+
+    @property
+    def capacity(self):
+        try:
+            return os.path.getsize(self.path) // (self.dim * 4)
+        except OSError:
+            return 0
+
+    def _view(self):
+        capacity = self.capacity
+        if self._map is None or len(self._map) != capacity:
+            self._map = np.memmap(self.path, dtype=np.float32, mode="r", shape=(capacity, self.dim)) if capacity else None
+        return self._map
+
+    def write(self, rows, vectors):
+        rows = np.asarray(rows, dtype=np.int64)
+        if not len(rows):
+            return
+        with self._lock:
+            needed = int(rows.max()) + 1
+            if needed > self.capacity:
+                with open(self.path, "ab") as f:
+                    f.truncate(max(needed, self.capacity * 2, 1024) * self.dim * 4)
+            matrix = np.memmap(self.path, dtype=np.float32, mode="r+", shape=(self.capacity, self.dim))
+            matrix[rows] = np.asarray(vectors, dtype=np.float32)
+            matrix.flush()
+            del matrix
+
+    def search(self, query, k=20, count=None, chunk=SEARCH_CHUNK):
+        """``(rows, scores)`` of the ``k`` best cosine matches among the first ``count`` rows."""
+        with self._lock:
+            matrix = self._view()
+        if matrix is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        count = len(matrix) if count is None else min(count, len(matrix))
+        query = np.asarray(query, dtype=np.float32)
+
+        best_rows, best_scores = [], []
+        for start in range(0, count, chunk):
+            scores = matrix[start:min(start + chunk, count)] @ query
+            if len(scores) > k:
+                top = np.argpartition(-scores, k - 1)[:k]
+            else:
+                top = np.arange(len(scores))
+            best_rows.append(top + start)
+            best_scores.append(scores[top])
+        rows, scores = np.concatenate(best_rows), np.concatenate(best_scores)
+        order = np.argsort(-scores, kind="stable")[:k]
+        return rows[order], scores[order]